@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the export writing path.
+
+Builds synthetic organizations from 1k to 1M team memberships, with
+shallow (balanced) or deep (long parent chains) team trees, and measures
+time, peak memory and bytes written for:
+
+- JSONExporter.export
+- CSVExporter._export_members, _export_teams and _export_memberships
+- building and expanding the team hierarchy
+- computing the team analytics tables (overlap rows are expanded too)
+
+Each writer runs in two modes: 'fresh' writes into an empty directory,
+'unchanged' rewrites identical data next to a previous export, so the
+content-hash check discards the new file.
+
+Results can be saved as a baseline and later runs checked against it:
+
+    python benchmarks/bench_exporters.py --sizes 1k,10k,100k --save-baseline baseline.json
+    python benchmarks/bench_exporters.py --sizes 1k,10k,100k --baseline baseline.json
+
+The check exits with status 1 if any case got slower or used more memory
+than the baseline by more than the threshold.
+"""
+
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from analytics import compute_analytics
+from exporters import CSVExporter, JSONExporter
+from records import OrgStore
+
+TREES = ("balanced", "deep")
+MODES = ("fresh", "unchanged")
+OPERATIONS = ("json", "csv_members", "csv_teams", "csv_memberships", "hierarchy", "analytics")
+
+# Children per team in a balanced tree
+BRANCHING = 8
+
+# Fixed CSV timestamp, so the 'unchanged' run targets the same file names
+TIMESTAMP = "20000101_000000"
+
+# Differences below these are treated as noise by the regression check
+MIN_TIME_DELTA = 0.05
+MIN_MEMORY_DELTA = 1024 * 1024
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse a membership count such as '10k' or '1m'.
+
+    Args:
+        text: Count, optionally suffixed with k or m
+
+    Returns:
+        Number of memberships
+    """
+    text = text.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+
+def build_store(memberships: int, tree: str, depth: int) -> OrgStore:
+    """
+    Build a synthetic organization.
+
+    The organization has one member per five memberships and one team per
+    twenty. Members are assigned to teams round-robin, so the data is the
+    same on every run.
+
+    Args:
+        memberships: Number of team memberships
+        tree: 'balanced' (each team has up to BRANCHING children) or
+            'deep' (teams form parent chains ``depth`` levels deep)
+        depth: Length of the parent chains in a deep tree
+
+    Returns:
+        Populated OrgStore
+    """
+    member_count = max(10, memberships // 5)
+    team_count = max(5, memberships // 20)
+    store = OrgStore()
+
+    for i in range(member_count):
+        store.add_member({
+            "id": 1_000_000 + i,
+            "login": f"user-{i}",
+            "name": f"User {i}",
+            "email": f"user-{i}@example.com" if i % 3 == 0 else None,
+            "type": "User",
+            "site_admin": False,
+            "company": f"Division {i % 40}",
+            "location": ("Berlin", "London", "New York", "Tokyo")[i % 4],
+            "bio": None,
+            "created_at": "2020-01-01T00:00:00+00:00",
+            "updated_at": "2024-01-01T00:00:00+00:00"
+        })
+
+    for t in range(team_count):
+        if tree == "deep":
+            parent = None if t % depth == 0 else t - 1
+        else:
+            parent = None if t == 0 else (t - 1) // BRANCHING
+        store.add_team({
+            "id": 5_000_000 + t,
+            "name": f"Team {t}",
+            "slug": f"team-{t}",
+            "description": f"Synthetic team {t}",
+            "privacy": "closed",
+            "permission": "pull",
+            "parent_id": None if parent is None else 5_000_000 + parent,
+            "parent_name": None if parent is None else f"Team {parent}",
+            "members_count": memberships // team_count,
+            "repos_count": t % 50,
+            "created_at": "2021-01-01T00:00:00+00:00",
+            "updated_at": "2024-01-01T00:00:00+00:00"
+        })
+
+    for edge in range(memberships):
+        t = edge % team_count
+        user = (edge // team_count + t * 7) % member_count
+        store.add_membership(
+            5_000_000 + t,
+            f"Team {t}",
+            1_000_000 + user,
+            role="maintainer" if edge % 25 == 0 else "member"
+        )
+
+    return store
+
+
+def _json(data: Dict[str, Any], store: OrgStore, output_dir: str) -> List[str]:
+    return [JSONExporter(output_dir).export(data, "bench")]
+
+
+def _csv_members(data: Dict[str, Any], store: OrgStore, output_dir: str) -> List[str]:
+    return [CSVExporter(output_dir)._export_members(data["members"], "bench", TIMESTAMP)]
+
+
+def _csv_teams(data: Dict[str, Any], store: OrgStore, output_dir: str) -> List[str]:
+    return [CSVExporter(output_dir)._export_teams(data["teams"], "bench", TIMESTAMP)]
+
+
+def _csv_memberships(data: Dict[str, Any], store: OrgStore, output_dir: str) -> List[str]:
+    return [CSVExporter(output_dir)._export_memberships(data["team_memberships"], "bench", TIMESTAMP)]
+
+
+def _hierarchy(data: Dict[str, Any], store: OrgStore, output_dir: str) -> List[str]:
+    store.team_hierarchy().to_dict()
+    return []
+
+
+def _analytics(data: Dict[str, Any], store: OrgStore, output_dir: str) -> List[str]:
+    tables = compute_analytics(data["teams"], data["team_memberships"])
+    for _ in tables["team_overlap"]:
+        pass
+    return []
+
+
+OPERATION_FUNCS: Dict[str, Callable[[Dict[str, Any], OrgStore, str], List[str]]] = {
+    "json": _json,
+    "csv_members": _csv_members,
+    "csv_teams": _csv_teams,
+    "csv_memberships": _csv_memberships,
+    "hierarchy": _hierarchy,
+    "analytics": _analytics
+}
+
+
+def run_case(op: str, mode: str, data: Dict[str, Any], store: OrgStore, repeat: int) -> Dict[str, Any]:
+    """
+    Measure one operation.
+
+    Time is the best of ``repeat`` runs without tracing; peak memory comes
+    from one additional run under tracemalloc.
+
+    Args:
+        op: Operation name (see OPERATIONS)
+        mode: 'fresh' or 'unchanged'
+        data: Export data from the store
+        store: Store the data was taken from
+        repeat: Number of timed runs
+
+    Returns:
+        Dictionary with seconds, peak_bytes and output_bytes
+    """
+    func = OPERATION_FUNCS[op]
+
+    def run(traced: bool):
+        output_dir = tempfile.mkdtemp(prefix="bench_exporters_")
+        try:
+            if mode == "unchanged":
+                func(data, store, output_dir)
+            gc.collect()
+            if traced:
+                tracemalloc.start()
+            start = time.perf_counter()
+            paths = func(data, store, output_dir)
+            elapsed = time.perf_counter() - start
+            peak = 0
+            if traced:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            size = sum(os.path.getsize(path) for path in paths)
+            return elapsed, peak, size
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    seconds = min(run(traced=False)[0] for _ in range(repeat))
+    _, peak, size = run(traced=True)
+    return {"seconds": seconds, "peak_bytes": peak, "output_bytes": size}
+
+
+def run_benchmarks(
+    sizes: List[int],
+    trees: List[str],
+    operations: List[str],
+    modes: List[str],
+    depth: int,
+    repeat: int
+) -> List[Dict[str, Any]]:
+    """
+    Run every combination of size, tree shape, operation and mode.
+
+    Returns:
+        List of result rows
+    """
+    results = []
+    for size in sizes:
+        for tree in trees:
+            store = build_store(size, tree, depth)
+            data = store.export_data({"id": 1, "login": "bench", "name": "Bench"}, {"complete": True})
+            for op in operations:
+                # The hierarchy and analytics are built in memory and have no mode
+                for mode in (["fresh"] if op in ("hierarchy", "analytics") else modes):
+                    row = {
+                        "case": f"{op}/{size}/{tree}/{mode}",
+                        "operation": op,
+                        "memberships": size,
+                        "tree": tree,
+                        "mode": mode
+                    }
+                    row.update(run_case(op, mode, data, store, repeat))
+                    results.append(row)
+                    print_row(row)
+            del data, store
+            gc.collect()
+    return results
+
+
+def _megabytes(value: int) -> str:
+    return f"{value / (1024 * 1024):.1f}"
+
+
+def print_header():
+    """Print the results table header."""
+    print(f"{'case':<44} {'seconds':>9} {'peak MB':>9} {'output MB':>10}")
+    print("-" * 75)
+
+
+def print_row(row: Dict[str, Any]):
+    """Print one result row."""
+    print(
+        f"{row['case']:<44} {row['seconds']:>9.3f} "
+        f"{_megabytes(row['peak_bytes']):>9} {_megabytes(row['output_bytes']):>10}"
+    )
+
+
+def check_regressions(
+    results: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    threshold: float
+) -> List[str]:
+    """
+    Compare results with a baseline.
+
+    A case regresses if its time or peak memory exceeds the baseline by
+    more than ``threshold`` (a ratio) and by more than a small absolute
+    margin, so noise on tiny cases is ignored. Cases missing from the
+    baseline are skipped.
+
+    Args:
+        results: Result rows from this run
+        baseline: Result rows from the baseline run
+        threshold: Allowed ratio, e.g. 1.25 for 25%
+
+    Returns:
+        List of regression descriptions (empty if none)
+    """
+    previous = {row["case"]: row for row in baseline}
+    regressions = []
+    for row in results:
+        base = previous.get(row["case"])
+        if base is None:
+            continue
+        if row["seconds"] > base["seconds"] * threshold and row["seconds"] - base["seconds"] > MIN_TIME_DELTA:
+            regressions.append(
+                f"{row['case']}: {row['seconds']:.3f}s vs {base['seconds']:.3f}s baseline "
+                f"({row['seconds'] / base['seconds']:.2f}x)"
+            )
+        if (
+            row["peak_bytes"] > base["peak_bytes"] * threshold
+            and row["peak_bytes"] - base["peak_bytes"] > MIN_MEMORY_DELTA
+        ):
+            regressions.append(
+                f"{row['case']}: peak {_megabytes(row['peak_bytes'])} MB vs "
+                f"{_megabytes(base['peak_bytes'])} MB baseline"
+            )
+        if row["output_bytes"] != base["output_bytes"]:
+            print(
+                f"Note: {row['case']} output size changed "
+                f"({base['output_bytes']} -> {row['output_bytes']} bytes)"
+            )
+    return regressions
+
+
+def parse_arguments(argv: Optional[List[str]] = None):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark the JSON/CSV export writing path")
+
+    parser.add_argument(
+        "--sizes",
+        default="1k,10k,100k,1m",
+        help="Comma-separated membership counts (default: 1k,10k,100k,1m)"
+    )
+
+    parser.add_argument(
+        "--trees",
+        default=",".join(TREES),
+        help="Comma-separated team tree shapes: balanced, deep (default: both)"
+    )
+
+    parser.add_argument(
+        "--operations",
+        default=",".join(OPERATIONS),
+        help=f"Comma-separated operations (default: {','.join(OPERATIONS)})"
+    )
+
+    parser.add_argument(
+        "--modes",
+        default=",".join(MODES),
+        help="Comma-separated modes: fresh, unchanged (default: both)"
+    )
+
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=100,
+        help="Parent chain length of deep team trees (default: 100)"
+    )
+
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Timed runs per case; the fastest is reported (default: 3)"
+    )
+
+    parser.add_argument(
+        "--output",
+        help="Write results to this JSON file"
+    )
+
+    parser.add_argument(
+        "--save-baseline",
+        help="Write results as a baseline to this JSON file"
+    )
+
+    parser.add_argument(
+        "--baseline",
+        help="Baseline JSON file to check for regressions"
+    )
+
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Allowed slowdown or memory growth ratio against the baseline (default: 1.25)"
+    )
+
+    return parser.parse_args(argv)
+
+
+def _split(text: str, allowed) -> List[str]:
+    values = [value.strip() for value in text.split(",") if value.strip()]
+    unknown = [value for value in values if value not in allowed]
+    if unknown:
+        raise SystemExit(f"Unknown value(s): {', '.join(unknown)} (expected {', '.join(allowed)})")
+    return values
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main entry point."""
+    args = parse_arguments(argv)
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+
+    print_header()
+    results = run_benchmarks(
+        sizes,
+        _split(args.trees, TREES),
+        _split(args.operations, OPERATIONS),
+        _split(args.modes, MODES),
+        args.depth,
+        max(1, args.repeat)
+    )
+
+    report = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "results": results
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nResults written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = check_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.2f}x:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.threshold:.2f}x of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
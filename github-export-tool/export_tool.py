@@ -7,16 +7,29 @@ from GitHub organizations in JSON or CSV format.
 """
 
 import argparse
+import csv
 import sys
 import os
 import logging
+from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from github_client import GitHubClient
-from exporters import Exporter
+from retry import RetryPolicy
+from estimator import estimate_cost, select_strategy, print_estimate
+from sharding import ShardSpec, load_export, merge_exports
+from diffing import DEFAULT_BUFFER_SIZE, ExportReader, diff_exports, print_diff_summary
+from audit_log import AuditLogExporter, build_phrase
+from team_repos import TeamRepoCache
+from usage_converter import DEFAULT_CHUNK_SIZE, convert_usage
+from analytics import add_analytics
+from history import DEFAULT_CHECKPOINT_INTERVAL, SnapshotState, SnapshotStore, state_from_export_file
+from exporters import Exporter, save_manifest, write_json
+from profiling import PhaseProfiler, profile_phase
 from utils import (
     setup_logging,
     get_github_token,
@@ -49,6 +62,42 @@ Examples:
   # Use GitHub Enterprise Server
   python export_tool.py --org my-org --api-url https://github.company.com/api/v3
 
+  # Estimate API calls and wall time without exporting
+  python export_tool.py --org my-org --dry-run
+
+  # Export only one division (a team and every team below it)
+  python export_tool.py --org my-org --team engineering --include-descendants
+
+  # Include the team -> repository permission matrix
+  python export_tool.py --org my-org --team-repos --format csv
+
+  # Add team overlap and membership analytics tables
+  python export_tool.py --org my-org --analytics --format csv
+
+  # Export one of four disjoint slices (run 1/4 .. 4/4 on separate machines)
+  python export_tool.py --org my-org --shard 1/4
+
+  # Merge shard outputs into a single export
+  python export_tool.py merge exports/my-org_shard1of4_export_*.json \
+      exports/my-org_shard2of4_export_*.json ... --format both
+
+  # Compare two exports (JSON, or any file of a CSV/NDJSON set)
+  python export_tool.py diff exports/my-org_export_20240101_120000.json \
+      exports/my-org_export_20240201_120000.json
+
+  # Export new audit log events for team changes since the last run
+  python export_tool.py audit-log --org my-org --action team --format sqlite
+
+  # Keep each export in the snapshot history, then chart a team's headcount
+  python export_tool.py --org my-org --history
+  python export_tool.py history headcount --org my-org --team engineering
+
+  # Normalize Copilot usage dumps into an indexed SQLite database
+  python export_tool.py convert-usage ../synthetic_data_for_functionality_tests --format sqlite
+
+  # Find out where a slow export spends its time
+  python export_tool.py --org my-org --profile
+
   # Use token from environment variable
   export GITHUB_TOKEN=ghp_xxxxx
   python export_tool.py --org my-org
@@ -90,6 +139,81 @@ Required GitHub Token Permissions:
         help="GitHub personal access token (alternatively use GITHUB_TOKEN env var)"
     )
     
+    parser.add_argument(
+        "--team",
+        metavar="SLUG",
+        help="Only export this team, its members and their memberships"
+    )
+    
+    parser.add_argument(
+        "--include-descendants",
+        action="store_true",
+        help="With --team, also export every team below it"
+    )
+    
+    parser.add_argument(
+        "--team-repos",
+        action="store_true",
+        help="Also export each team's repositories and permission (unchanged teams are reused from the last run)"
+    )
+    
+    parser.add_argument(
+        "--history",
+        action="store_true",
+        help="Also add the export to the snapshot history in the output directory"
+    )
+    
+    parser.add_argument(
+        "--analytics",
+        action="store_true",
+        help="Add team overlap, multi-team user and team size by depth tables to the export"
+    )
+    
+    parser.add_argument(
+        "--shard",
+        type=ShardSpec.parse,
+        help="Export only slice i of N (e.g. 1/4); combine the outputs with the merge command"
+    )
+    
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile each phase (cProfile, peak memory, sleep/network/CPU time) into a profile directory"
+    )
+    
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=5,
+        help="Maximum attempts per API request for transient errors (default: 5)"
+    )
+    
+    parser.add_argument(
+        "--retry-budget",
+        type=int,
+        default=100,
+        help="Maximum total retries for the whole run (default: 100)"
+    )
+    
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Estimate API calls, rate-limit windows and wall time, then exit"
+    )
+    
+    parser.add_argument(
+        "--fields",
+        choices=["auto", "full", "lite"],
+        default="auto",
+        help="Fetch full profiles, only list fields (lite), or choose from the estimate (default: auto)"
+    )
+    
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Number of parallel API requests (default: chosen from the estimate)"
+    )
+    
     parser.add_argument(
         "--log-level",
         choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
@@ -111,8 +235,512 @@ Required GitHub Token Permissions:
     return parser.parse_args()
 
 
+def parse_merge_arguments(argv):
+    """Parse command-line arguments for the merge command."""
+    parser = argparse.ArgumentParser(
+        prog="export_tool.py merge",
+        description="Merge sharded JSON exports into a single export"
+    )
+    
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="Shard JSON export files"
+    )
+    
+    parser.add_argument(
+        "--format",
+        choices=["json", "csv", "both"],
+        default="json",
+        help="Export format (default: json)"
+    )
+    
+    parser.add_argument(
+        "--output",
+        default="./exports",
+        help="Output directory for exports (default: ./exports)"
+    )
+    
+    parser.add_argument(
+        "--analytics",
+        action="store_true",
+        help="Add team overlap, multi-team user and team size by depth tables to the merged export"
+    )
+    
+    parser.add_argument(
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO",
+        help="Logging level (default: INFO)"
+    )
+    
+    return parser.parse_args(argv)
+
+
+def write_exports(exporter: Exporter, data: dict, name: str, export_format: str,
+                  profiler: Optional[PhaseProfiler] = None) -> list:
+    """
+    Write export data in the requested format(s).
+    
+    Args:
+        exporter: Exporter to write with
+        data: Export data dictionary
+        name: Name used as the filename prefix
+        export_format: 'json', 'csv' or 'both'
+        profiler: Profiler for the export_json/export_csv phases (optional)
+        
+    Returns:
+        List of exported file paths
+    """
+    exported_files = []
+    
+    # One manifest for all formats, listing only the files of this run
+    manifest = exporter.manifest(name)
+    
+    print(f"\n💾 Exporting to {export_format.upper()} format...")
+    
+    if export_format in ["json", "both"]:
+        with profile_phase(profiler, "export_json"):
+            filepath = exporter.export(data, name, "json", manifest)
+        exported_files.append(filepath)
+        if filepath in exporter.unchanged_files:
+            print("✓ JSON export unchanged since last run (not rewritten)")
+        else:
+            print("✓ JSON export completed")
+    
+    if export_format in ["csv", "both"]:
+        with profile_phase(profiler, "export_csv"):
+            filepaths = exporter.export(data, name, "csv", manifest)
+        exported_files.extend(filepaths)
+        unchanged = [path for path in filepaths if path in exporter.unchanged_files]
+        if unchanged:
+            print(f"✓ CSV export completed ({len(unchanged)} of {len(filepaths)} files unchanged, not rewritten)")
+        else:
+            print("✓ CSV export completed")
+    
+    save_manifest(manifest, data)
+    return exported_files
+
+
+def merge_main(argv):
+    """Entry point for the merge command."""
+    args = parse_merge_arguments(argv)
+    setup_logging(args.log_level)
+    
+    try:
+        print(f"\n🔗 Merging {len(args.inputs)} exports...")
+        exports = [load_export(path) for path in args.inputs]
+        data = merge_exports(exports)
+        if args.analytics:
+            data = add_analytics(data)
+        print_summary(data)
+        
+        exported_files = write_exports(Exporter(args.output), data, data["organization"]["login"], args.format)
+        print_exported_files(exported_files)
+        
+        status = data["export_status"]
+        if not status["complete"]:
+            print("\n⚠️  Merged export is INCOMPLETE:")
+            for error in status["errors"]:
+                print(f"  - {error}")
+            sys.exit(2)
+        
+        print("\n✅ Merge completed successfully!")
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Merge failed: {e}", exc_info=True)
+        print(f"\n❌ Merge failed: {e}")
+        sys.exit(1)
+
+
+def parse_diff_arguments(argv):
+    """Parse command-line arguments for the diff command."""
+    parser = argparse.ArgumentParser(
+        prog="export_tool.py diff",
+        description="Compare two exports and write a structured change report"
+    )
+    
+    parser.add_argument(
+        "base",
+        help="Base (older) export: a JSON file or any file of a CSV/NDJSON set"
+    )
+    
+    parser.add_argument(
+        "target",
+        help="Target (newer) export: a JSON file or any file of a CSV/NDJSON set"
+    )
+    
+    parser.add_argument(
+        "--output",
+        default="./exports",
+        help="Output directory for the change report (default: ./exports)"
+    )
+    
+    parser.add_argument(
+        "--buffer-size",
+        type=int,
+        default=DEFAULT_BUFFER_SIZE,
+        help=f"Records held in memory per sort run (default: {DEFAULT_BUFFER_SIZE})"
+    )
+    
+    parser.add_argument(
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO",
+        help="Logging level (default: INFO)"
+    )
+    
+    return parser.parse_args(argv)
+
+
+def diff_main(argv):
+    """Entry point for the diff command."""
+    args = parse_diff_arguments(argv)
+    setup_logging(args.log_level)
+    
+    try:
+        print("\n🔍 Comparing exports...")
+        report = diff_exports(args.base, args.target, args.buffer_size)
+        try:
+            print_diff_summary(report)
+            
+            org = ExportReader(args.target).organization()
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_dir = Path(args.output)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            filepath = output_dir / f"{org.get('login', 'export')}_diff_{timestamp}.json"
+            with open(filepath, "w", encoding="utf-8") as f:
+                write_json(report.to_export(), f)
+        finally:
+            report.close()
+        
+        print_exported_files([str(filepath)])
+        print("\n✅ Diff completed successfully!")
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Diff failed: {e}", exc_info=True)
+        print(f"\n❌ Diff failed: {e}")
+        sys.exit(1)
+
+
+def parse_audit_log_arguments(argv):
+    """Parse command-line arguments for the audit-log command."""
+    parser = argparse.ArgumentParser(
+        prog="export_tool.py audit-log",
+        description="Export organization audit log events incrementally to NDJSON or SQLite"
+    )
+    
+    parser.add_argument(
+        "--org",
+        required=True,
+        help="GitHub organization name"
+    )
+    
+    parser.add_argument(
+        "--format",
+        choices=["ndjson", "sqlite"],
+        default="ndjson",
+        help="Output format (default: ndjson)"
+    )
+    
+    parser.add_argument(
+        "--action",
+        action="append",
+        help="Only export this action or action category (e.g. team.add_member); repeatable"
+    )
+    
+    parser.add_argument(
+        "--since",
+        help="Only export events on or after this date (YYYY-MM-DD)"
+    )
+    
+    parser.add_argument(
+        "--until",
+        help="Only export events on or before this date (YYYY-MM-DD)"
+    )
+    
+    parser.add_argument(
+        "--phrase",
+        help="Additional audit log search phrase (e.g. 'actor:octocat')"
+    )
+    
+    parser.add_argument(
+        "--include",
+        choices=["web", "git", "all"],
+        default="all",
+        help="Event sources to include (default: all)"
+    )
+    
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the saved cursor and export all matching events again"
+    )
+    
+    parser.add_argument(
+        "--output",
+        default="./exports",
+        help="Output directory for exports (default: ./exports)"
+    )
+    
+    parser.add_argument(
+        "--api-url",
+        default="https://api.github.com",
+        help="GitHub API URL (for GitHub Enterprise, default: https://api.github.com)"
+    )
+    
+    parser.add_argument(
+        "--token",
+        help="GitHub personal access token (alternatively use GITHUB_TOKEN env var)"
+    )
+    
+    parser.add_argument(
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO",
+        help="Logging level (default: INFO)"
+    )
+    
+    return parser.parse_args(argv)
+
+
+def audit_log_main(argv):
+    """Entry point for the audit-log command."""
+    args = parse_audit_log_arguments(argv)
+    setup_logging(args.log_level)
+    
+    try:
+        if not validate_org_name(args.org):
+            logger.error(f"Invalid organization name: {args.org}")
+            sys.exit(1)
+        
+        if not validate_api_url(args.api_url):
+            logger.error(f"Invalid API URL: {args.api_url}")
+            sys.exit(1)
+        
+        token = args.token if args.token else get_github_token()
+        
+        if not token:
+            logger.error("GitHub token is required")
+            sys.exit(1)
+        
+        phrase = build_phrase(args.action, args.since, args.until, args.phrase)
+        print(f"\n📜 Exporting audit log for {args.org}" + (f" matching '{phrase}'" if phrase else ""))
+        
+        exporter = AuditLogExporter(token, args.api_url, args.output)
+        result = exporter.export(args.org, args.format, phrase, args.include, args.full)
+        exporter.close()
+        
+        print(f"✓ {result['events']} new events from {result['pages']} pages")
+        print_exported_files([result["path"]])
+        print("\n✅ Audit log export completed successfully!")
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Export interrupted by user (progress saved; rerun to resume)")
+        sys.exit(130)
+    except Exception as e:
+        logger.error(f"Audit log export failed: {e}", exc_info=True)
+        print(f"\n❌ Audit log export failed: {e}")
+        sys.exit(1)
+
+
+def parse_convert_usage_arguments(argv):
+    """Parse command-line arguments for the convert-usage command."""
+    parser = argparse.ArgumentParser(
+        prog="export_tool.py convert-usage",
+        description="Normalize Copilot usage CSV/NDJSON/JSON files into SQLite or day-partitioned NDJSON"
+    )
+    
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="Usage files or directories containing them"
+    )
+    
+    parser.add_argument(
+        "--format",
+        choices=["sqlite", "ndjson"],
+        default="sqlite",
+        help="Output format (default: sqlite)"
+    )
+    
+    parser.add_argument(
+        "--output",
+        default="./exports",
+        help="Output directory (default: ./exports)"
+    )
+    
+    parser.add_argument(
+        "--name",
+        default="copilot_usage",
+        help="Output name: {name}.sqlite or {name}/{day}.ndjson (default: copilot_usage)"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes (default: number of CPUs)"
+    )
+    
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE // (1024 * 1024),
+        help=f"Split CSV/NDJSON files into work units of this many MB (default: {DEFAULT_CHUNK_SIZE // (1024 * 1024)})"
+    )
+    
+    parser.add_argument(
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO",
+        help="Logging level (default: INFO)"
+    )
+    
+    return parser.parse_args(argv)
+
+
+def convert_usage_main(argv):
+    """Entry point for the convert-usage command."""
+    args = parse_convert_usage_arguments(argv)
+    setup_logging(args.log_level)
+    
+    try:
+        print(f"\n🔄 Converting Copilot usage data to {args.format}...")
+        result = convert_usage(
+            args.inputs,
+            output_dir=args.output,
+            output_format=args.format,
+            name=args.name,
+            workers=args.workers,
+            chunk_size=max(1, args.chunk_size) * 1024 * 1024
+        )
+        print(
+            f"✓ {result['records']} records from {result['files']} files -> "
+            f"{result['written']} records over {result['days']} days "
+            f"({result['duplicates']} duplicates, {result['skipped']} skipped)"
+        )
+        print_exported_files([result["path"]])
+        print("\n✅ Conversion completed successfully!")
+    except (OSError, ValueError) as e:
+        logger.error(f"Conversion failed: {e}", exc_info=True)
+        print(f"\n❌ Conversion failed: {e}")
+        sys.exit(1)
+
+
+def parse_history_arguments(argv):
+    """Parse command-line arguments for the history command."""
+    parser = argparse.ArgumentParser(
+        prog="export_tool.py history",
+        description="Keep exports as compact deltas and query membership history"
+    )
+    parser.add_argument(
+        "--output",
+        default="./exports",
+        help="Directory containing the {org}_history store (default: ./exports)"
+    )
+    parser.add_argument(
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO",
+        help="Logging level (default: INFO)"
+    )
+    actions = parser.add_subparsers(dest="action", required=True)
+    
+    add = actions.add_parser("add", help="Add JSON exports to the history, oldest first")
+    add.add_argument("inputs", nargs="+", help="JSON export files")
+    add.add_argument(
+        "--checkpoint-interval",
+        type=int,
+        default=DEFAULT_CHECKPOINT_INTERVAL,
+        help=f"Write a full checkpoint every N snapshots (default: {DEFAULT_CHECKPOINT_INTERVAL})"
+    )
+    
+    listing = actions.add_parser("list", help="List the snapshots in the history")
+    listing.add_argument("--org", required=True, help="GitHub organization name")
+    
+    at = actions.add_parser("at", help="Reconstruct the export at a point in time")
+    at.add_argument("--org", required=True, help="GitHub organization name")
+    at.add_argument("--time", help="ISO date or timestamp (default: latest snapshot)")
+    at.add_argument(
+        "--format",
+        choices=["json", "csv", "both"],
+        default="json",
+        help="Export format (default: json)"
+    )
+    
+    headcount = actions.add_parser("headcount", help="Print a team's headcount at every snapshot")
+    headcount.add_argument("--org", required=True, help="GitHub organization name")
+    headcount.add_argument("--team", required=True, help="Team slug or ID")
+    headcount.add_argument("--csv", help="Also write the series to this CSV file")
+    
+    return parser.parse_args(argv)
+
+
+def history_main(argv):
+    """Entry point for the history command."""
+    args = parse_history_arguments(argv)
+    setup_logging(args.log_level)
+    
+    try:
+        if args.action == "add":
+            for path in args.inputs:
+                state, status, timestamp = state_from_export_file(path)
+                if not status.get("complete", True):
+                    print(f"⚠️  Skipping incomplete export {path}")
+                    continue
+                store = SnapshotStore(args.output, state.organization["login"], args.checkpoint_interval)
+                entry = store.append(state, timestamp)
+                print(f"✓ {path} -> {entry['kind']} snapshot {entry['seq']} ({entry['timestamp']})")
+        
+        elif args.action == "list":
+            store = SnapshotStore(args.output, args.org)
+            print(f"\n{'Seq':>5}  {'Timestamp':<20} {'Kind':<11} {'Teams changed':>13}")
+            for snapshot in store.snapshots:
+                changed = "-" if snapshot["kind"] == "checkpoint" else len(snapshot["headcounts"])
+                print(f"{snapshot['seq']:>5}  {snapshot['timestamp']:<20} {snapshot['kind']:<11} {changed:>13}")
+        
+        elif args.action == "at":
+            store = SnapshotStore(args.output, args.org)
+            state = store.state_at(args.time)
+            data = state.to_export({"complete": True, "errors": [], "reconstructed_at": args.time or "latest"})
+            print_summary(data)
+            stamp = (args.time or "latest").replace(":", "").replace("-", "")
+            exported_files = write_exports(Exporter(args.output), data, f"{args.org}_at_{stamp}", args.format)
+            print_exported_files(exported_files)
+        
+        elif args.action == "headcount":
+            store = SnapshotStore(args.output, args.org)
+            team_id = store.resolve_team(args.team)
+            if team_id is None:
+                raise ValueError(f"Team {args.team} not found in the history")
+            series = store.headcount_series(team_id)
+            print(f"\nHeadcount of team {args.team} ({team_id})")
+            for timestamp, count in series:
+                print(f"{timestamp:<20} {'-' if count is None else count:>8}")
+            if args.csv:
+                with open(args.csv, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(["timestamp", "headcount"])
+                    writer.writerows(series)
+                print(f"\nSeries written to {args.csv}")
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"History command failed: {e}", exc_info=True)
+        print(f"\n❌ History command failed: {e}")
+        sys.exit(1)
+
+
+COMMANDS = {
+    "merge": merge_main,
+    "diff": diff_main,
+    "audit-log": audit_log_main,
+    "convert-usage": convert_usage_main,
+    "history": history_main
+}
+
+
 def main():
     """Main entry point."""
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+    
     args = parse_arguments()
     
     # Setup logging
@@ -122,6 +750,10 @@ def main():
     if not args.no_banner:
         print_banner()
     
+    profiler = PhaseProfiler(args.output, args.org) if args.profile else None
+    if profiler is not None:
+        profiler.start()
+    
     try:
         # Validate inputs
         if not validate_org_name(args.org):
@@ -132,6 +764,14 @@ def main():
             logger.error(f"Invalid API URL: {args.api_url}")
             sys.exit(1)
         
+        if args.include_descendants and not args.team:
+            logger.error("--include-descendants requires --team")
+            sys.exit(1)
+        
+        if args.team and args.shard:
+            logger.error("--team cannot be combined with --shard")
+            sys.exit(1)
+        
         # Get GitHub token
         token = args.token if args.token else get_github_token()
         
@@ -141,61 +781,125 @@ def main():
         
         # Initialize GitHub client
         logger.info(f"Connecting to GitHub API: {args.api_url}")
-        client = GitHubClient(token, args.api_url)
+        retry_policy = RetryPolicy(max_attempts=args.max_retries, budget=args.retry_budget)
+        if profiler is not None:
+            retry_policy.sleep = profiler.sleep
+        client = GitHubClient(token, args.api_url, retry_policy=retry_policy, shard=args.shard, profiler=profiler)
         
         # Validate token
         print("\n🔐 Validating GitHub token...")
-        if not client.validate_token():
+        with profile_phase(profiler, "validate"):
+            valid = client.validate_token()
+            if valid:
+                rate_limit = client.get_rate_limit()
+        if not valid:
             logger.error("GitHub token validation failed")
             logger.error("Please check your token and permissions")
             sys.exit(1)
         print("✓ Token validated successfully")
         
         # Check rate limit
-        rate_limit = client.get_rate_limit()
         print(f"📊 Rate limit: {rate_limit['core']['remaining']}/{rate_limit['core']['limit']} remaining")
         
+        # Estimate cost and pick a fetch strategy
+        print("\n🧮 Estimating export cost...")
+        with profile_phase(profiler, "estimate"):
+            estimate = estimate_cost(
+                client, args.org,
+                team_repos=args.team_repos,
+                team_slug=args.team,
+                include_descendants=args.include_descendants
+            )
+        if not estimate:
+            target = f"team {args.team} in {args.org}" if args.team else f"organization: {args.org}"
+            logger.error(f"Failed to read {target}")
+            sys.exit(1)
+        
+        if args.shard:
+            print(f"🧩 Exporting shard {args.shard}")
+            estimate = estimate.scaled(1 / args.shard.count)
+        
+        strategy = select_strategy(estimate, args.fields, args.concurrency)
+        print_estimate(estimate, strategy)
+        
+        if args.dry_run:
+            client.close()
+            print("\nDry run - no data exported.")
+            return
+        
+        client.set_strategy(strategy)
+        
         # Export data
-        print(f"\n📥 Exporting data from organization: {args.org}")
-        print("This may take a few minutes for large organizations...")
+        if args.team:
+            scope = " and its descendants" if args.include_descendants else ""
+            print(f"\n📥 Exporting team {args.team}{scope} from organization: {args.org}")
+        else:
+            print(f"\n📥 Exporting data from organization: {args.org}")
+        
+        name = args.org
+        if args.shard:
+            name = f"{args.org}_shard{args.shard.index}of{args.shard.count}"
+        elif args.team:
+            name = f"{args.org}_team_{args.team}"
+        team_repo_cache = TeamRepoCache.for_export(args.output, name) if args.team_repos else None
         
-        data = client.get_full_export_data(args.org)
+        data = client.get_full_export_data(
+            args.org,
+            team_repos=args.team_repos,
+            team_repo_cache=team_repo_cache,
+            team_slug=args.team,
+            include_descendants=args.include_descendants
+        )
         
         if not data:
             logger.error(f"Failed to export data from organization: {args.org}")
             sys.exit(1)
         
+        if team_repo_cache is not None:
+            team_repo_cache.save()
+            print(f"♻️  Team repositories: {team_repo_cache.hits} teams unchanged, {team_repo_cache.misses} fetched")
+        
+        if args.analytics:
+            print("\n📈 Computing team analytics...")
+            with profile_phase(profiler, "analytics"):
+                data = add_analytics(data)
+        
         # Print summary
         print_summary(data)
         
         # Export to file(s)
-        exporter = Exporter(args.output)
-        exported_files = []
-        
-        print(f"\n💾 Exporting to {args.format.upper()} format...")
-        
-        if args.format in ["json", "both"]:
-            filepath = exporter.export(data, args.org, "json")
-            exported_files.append(filepath)
-            print(f"✓ JSON export completed")
-        
-        if args.format in ["csv", "both"]:
-            filepaths = exporter.export(data, args.org, "csv")
-            exported_files.extend(filepaths)
-            print(f"✓ CSV export completed")
+        exported_files = write_exports(Exporter(args.output), data, name, args.format, profiler)
         
         # Print exported files
         print_exported_files(exported_files)
         
+        if args.history:
+            if data.get("export_status", {}).get("complete", True):
+                with profile_phase(profiler, "history"):
+                    state = SnapshotState.from_records(
+                        data["organization"], data["members"], data["teams"], data["team_memberships"]
+                    )
+                    entry = SnapshotStore(args.output, name).append(state)
+                print(f"🕒 Added {entry['kind']} snapshot {entry['seq']} to the history")
+            else:
+                logger.warning("Export is incomplete; not adding it to the history")
+        
         # Check final rate limit
         final_rate_limit = client.get_rate_limit()
         print(f"\n📊 Final rate limit: {final_rate_limit['core']['remaining']}/{final_rate_limit['core']['limit']} remaining")
         
-        print("\n✅ Export completed successfully!")
-        
         # Close client
         client.close()
         
+        status = data.get("export_status", {})
+        if not status.get("complete", True):
+            print("\n⚠️  Export is INCOMPLETE - some data could not be fetched:")
+            for error in status.get("errors", []):
+                print(f"  - {error}")
+            sys.exit(2)
+        
+        print("\n✅ Export completed successfully!")
+        
     except KeyboardInterrupt:
         print("\n\n⚠️  Export interrupted by user")
         sys.exit(130)
@@ -203,6 +907,10 @@ def main():
         logger.error(f"Export failed: {e}", exc_info=True)
         print(f"\n❌ Export failed: {e}")
         sys.exit(1)
+    finally:
+        if profiler is not None:
+            profiler.finish()
+            profiler.print_summary()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,266 @@
+"""
+Team overlap and membership analytics.
+
+Memberships are turned into a sparse user x team incidence matrix in
+compressed sparse row form (one row of team columns per user). Shared
+member counts for every pair of teams are the non-zero entries of the
+product of the matrix with its transpose, computed by counting the team
+pairs within each user's row. The cost grows with the sum of squared
+teams-per-user, not with the square of the number of teams, so pairs of
+teams without shared members are never visited.
+"""
+
+import logging
+from array import array
+from collections import Counter
+from itertools import combinations
+from statistics import median
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from records import RecordView
+
+logger = logging.getLogger(__name__)
+
+# Number of user rows whose team pairs are counted in one batch
+PAIR_BATCH_ROWS = 4096
+
+
+class IncidenceMatrix:
+    """Sparse user x team incidence matrix (CSR, rows are users)."""
+
+    def __init__(self, team_ids: List[int], user_ids: List[int], row_ptr: array, col_idx: array):
+        """
+        Wrap CSR arrays.
+
+        Args:
+            team_ids: Team ID of each column, ascending
+            user_ids: User ID of each row, ascending
+            row_ptr: Start of each row in ``col_idx`` (one extra entry at the end)
+            col_idx: Column (team) indices of each row, ascending within a row
+        """
+        self.team_ids = team_ids
+        self.user_ids = user_ids
+        self.row_ptr = row_ptr
+        self.col_idx = col_idx
+
+    @classmethod
+    def from_memberships(cls, memberships: Iterable[Dict[str, Any]], team_ids: Iterable[int] = ()) -> "IncidenceMatrix":
+        """
+        Build the matrix from membership edges.
+
+        Duplicate edges (the same user in a team twice, such as with both
+        roles) count once.
+
+        Args:
+            memberships: Membership dictionaries with team_id and user_id
+            team_ids: Teams to include as columns even without members
+
+        Returns:
+            IncidenceMatrix
+        """
+        edge_user, edge_team = array("q"), array("q")
+        for edge in memberships:
+            edge_user.append(edge["user_id"])
+            edge_team.append(edge["team_id"])
+        teams = sorted(set(team_ids).union(edge_team))
+        users = sorted(set(edge_user))
+        team_col = {team_id: col for col, team_id in enumerate(teams)}
+        user_row = {user_id: row for row, user_id in enumerate(users)}
+
+        # One integer key per cell: sorting the keys orders cells by row, then column
+        width = max(len(teams), 1)
+        keys = sorted({user_row[user_id] * width + team_col[team_id] for user_id, team_id in zip(edge_user, edge_team)})
+        del edge_user, edge_team
+
+        row_ptr = array("l", bytes(array("l").itemsize * (len(users) + 1)))
+        col_idx = array("l")
+        for key in keys:
+            row, col = divmod(key, width)
+            row_ptr[row + 1] += 1
+            col_idx.append(col)
+        for row in range(len(users)):
+            row_ptr[row + 1] += row_ptr[row]
+        return cls(teams, users, row_ptr, col_idx)
+
+    def row(self, row: int) -> array:
+        """Team columns of one user row."""
+        return self.col_idx[self.row_ptr[row]:self.row_ptr[row + 1]]
+
+    def row_counts(self) -> List[int]:
+        """Number of teams of each user."""
+        ptr = self.row_ptr
+        return [ptr[row + 1] - ptr[row] for row in range(len(self.user_ids))]
+
+    def column_counts(self) -> List[int]:
+        """Number of distinct members of each team."""
+        counts = Counter(self.col_idx)
+        return [counts.get(col, 0) for col in range(len(self.team_ids))]
+
+    def cooccurrence(self) -> Counter:
+        """
+        Shared member counts of every pair of teams with at least one.
+
+        Returns:
+            Counter keyed by ``col_a * columns + col_b`` (col_a < col_b)
+        """
+        width = len(self.team_ids)
+        pairs = Counter()
+        batch: List[int] = []
+        for row in range(len(self.user_ids)):
+            cols = self.row(row)
+            if len(cols) > 1:
+                batch.extend(a * width + b for a, b in combinations(cols, 2))
+            if (row + 1) % PAIR_BATCH_ROWS == 0 and batch:
+                pairs.update(batch)
+                batch = []
+        pairs.update(batch)
+        return pairs
+
+
+def team_depths(teams: Iterable[Dict[str, Any]]) -> Dict[int, int]:
+    """
+    Depth of each team in the hierarchy.
+
+    Teams whose parent is not among the teams are roots (depth 0), as in
+    the exported team hierarchy.
+
+    Args:
+        teams: Team dictionaries with id and parent_id
+
+    Returns:
+        Dictionary of team ID to depth
+    """
+    parents = {team["id"]: team.get("parent_id") for team in teams}
+    depths: Dict[int, int] = {}
+    for team_id in parents:
+        path = []
+        current: Optional[int] = team_id
+        while current is not None and current not in depths:
+            path.append(current)
+            parent = parents.get(current)
+            current = parent if parent in parents and parent not in path else None
+        depth = -1 if current is None else depths[current]
+        for node in reversed(path):
+            depth += 1
+            depths[node] = depth
+    return depths
+
+
+def compute_analytics(teams: Iterable[Dict[str, Any]], memberships: Iterable[Dict[str, Any]]) -> Dict[str, Sequence[Dict[str, Any]]]:
+    """
+    Compute team overlap and membership analytics tables.
+
+    Tables:
+
+    - ``team_overlap``: every pair of teams sharing at least one member,
+      with shared member count and Jaccard index
+    - ``team_count_distribution``: number of users by number of teams
+    - ``multi_team_users``: users in more than one team
+    - ``team_size_by_depth``: member count statistics per hierarchy depth
+
+    Args:
+        teams: Team dictionaries
+        memberships: Membership dictionaries
+
+    Returns:
+        Dictionary of table name to rows, in canonical (ID) order; team
+        overlap rows are a record view
+    """
+    teams = list(teams)
+    names = {team["id"]: team.get("name") for team in teams}
+    logins = {}
+
+    def edges():
+        for edge in memberships:
+            logins.setdefault(edge["user_id"], edge.get("user_login"))
+            names.setdefault(edge["team_id"], edge.get("team_name"))
+            yield edge
+
+    matrix = IncidenceMatrix.from_memberships(edges(), [team["id"] for team in teams])
+    sizes = matrix.column_counts()
+    team_ids = matrix.team_ids
+    width = len(team_ids)
+
+    # Overlapping pairs are kept as two arrays and expanded to rows only
+    # when the exporters write them
+    pairs = matrix.cooccurrence()
+    pair_keys = array("q", sorted(pairs))
+    pair_shared = array("l", (pairs[key] for key in pair_keys))
+    del pairs
+
+    def expand_pair(i: int) -> Dict[str, Any]:
+        a, b = divmod(pair_keys[i], width)
+        shared = pair_shared[i]
+        return {
+            "team_a_id": team_ids[a],
+            "team_a_name": names.get(team_ids[a]),
+            "team_b_id": team_ids[b],
+            "team_b_name": names.get(team_ids[b]),
+            "shared_members": shared,
+            "team_a_members": sizes[a],
+            "team_b_members": sizes[b],
+            "jaccard": round(shared / (sizes[a] + sizes[b] - shared), 4)
+        }
+
+    overlap = RecordView(lambda: len(pair_keys), expand_pair)
+
+    teams_per_user = matrix.row_counts()
+    distribution = Counter(teams_per_user)
+    multi_team_users = [
+        {"user_id": user_id, "user_login": logins.get(user_id), "teams": count}
+        for user_id, count in zip(matrix.user_ids, teams_per_user)
+        if count > 1
+    ]
+
+    depths = team_depths(teams)
+    by_depth: Dict[int, List[int]] = {}
+    for col, team_id in enumerate(team_ids):
+        by_depth.setdefault(depths.get(team_id, 0), []).append(sizes[col])
+    size_by_depth = [
+        {
+            "depth": depth,
+            "teams": len(counts),
+            "min_members": min(counts),
+            "max_members": max(counts),
+            "mean_members": round(sum(counts) / len(counts), 2),
+            "median_members": median(counts),
+            "total_members": sum(counts)
+        }
+        for depth, counts in sorted(by_depth.items())
+    ]
+
+    logger.info(
+        f"Analytics: {len(overlap)} overlapping team pairs, "
+        f"{len(multi_team_users)} users in more than one team"
+    )
+    return {
+        "team_overlap": overlap,
+        "team_count_distribution": [
+            {"teams_per_user": count, "users": users} for count, users in sorted(distribution.items())
+        ],
+        "multi_team_users": multi_team_users,
+        "team_size_by_depth": size_by_depth
+    }
+
+
+def add_analytics(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add analytics tables to export data.
+
+    The ``analytics`` key is placed before ``statistics`` so the run
+    information stays at the end of the export.
+
+    Args:
+        data: Export data dictionary
+
+    Returns:
+        New export data dictionary with an ``analytics`` key
+    """
+    analytics = compute_analytics(data.get("teams", []), data.get("team_memberships", []))
+    result = {}
+    for key, value in data.items():
+        if key == "statistics":
+            result["analytics"] = analytics
+        result[key] = value
+    result.setdefault("analytics", analytics)
+    return result
@@ -0,0 +1,295 @@
+"""
+Streaming export of the organization audit log.
+
+Events are fetched page by page from ``/orgs/{org}/audit-log`` using the
+cursor from the ``Link`` header, filtered on the server with a search
+phrase, and written straight to NDJSON or SQLite. The cursor of the last
+page is saved after every page, so an interrupted export resumes where it
+stopped and later runs fetch only new events.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from github import GithubException
+
+from retry import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+# Largest page size accepted by the audit log API
+PER_PAGE = 100
+
+
+def build_phrase(
+    actions: Optional[List[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    phrase: Optional[str] = None
+) -> str:
+    """
+    Build an audit log search phrase for server-side filtering.
+
+    Args:
+        actions: Actions or action categories (e.g. 'team.add_member', 'team')
+        since: Earliest event date (YYYY-MM-DD)
+        until: Latest event date (YYYY-MM-DD)
+        phrase: Additional raw search phrase
+
+    Returns:
+        Search phrase
+    """
+    parts = [f"action:{action}" for action in actions or []]
+    if since and until:
+        parts.append(f"created:{since}..{until}")
+    elif since:
+        parts.append(f"created:>={since}")
+    elif until:
+        parts.append(f"created:<={until}")
+    if phrase:
+        parts.append(phrase)
+    return " ".join(parts)
+
+
+class NDJSONSink:
+    """Append audit log events to an NDJSON file."""
+
+    def __init__(self, filepath: Path):
+        self.filepath = filepath
+        self._file = open(filepath, "a", encoding="utf-8")
+
+    def write(self, events: List[Dict[str, Any]]):
+        for event in events:
+            self._file.write(json.dumps(event, ensure_ascii=False, sort_keys=True) + "\n")
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class SQLiteSink:
+    """Store audit log events in an indexed SQLite table."""
+
+    def __init__(self, filepath: Path):
+        self.filepath = filepath
+        self._db = sqlite3.connect(str(filepath))
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS audit_log ("
+            "document_id TEXT PRIMARY KEY, "
+            "timestamp INTEGER, "
+            "action TEXT, "
+            "actor TEXT, "
+            "user TEXT, "
+            "team TEXT, "
+            "data TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_audit_log_timestamp ON audit_log (timestamp)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_audit_log_action ON audit_log (action)")
+
+    def write(self, events: List[Dict[str, Any]]):
+        self._db.executemany(
+            "INSERT OR IGNORE INTO audit_log VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    event.get("_document_id"),
+                    event.get("@timestamp"),
+                    event.get("action"),
+                    event.get("actor"),
+                    event.get("user"),
+                    event.get("team"),
+                    json.dumps(event, ensure_ascii=False, sort_keys=True)
+                )
+                for event in events
+            ]
+        )
+
+    def flush(self):
+        self._db.commit()
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+
+SINKS = {
+    "ndjson": NDJSONSink,
+    "sqlite": SQLiteSink
+}
+
+
+class AuditLogExporter:
+    """Export organization audit log events incrementally."""
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = "https://api.github.com",
+        output_dir: str = "./exports",
+        retry_policy: Optional[RetryPolicy] = None
+    ):
+        """
+        Initialize audit log exporter.
+
+        Args:
+            token: GitHub personal access token (needs read:audit_log)
+            base_url: GitHub API base URL (for GitHub Enterprise)
+            output_dir: Directory for the event file and cursor state
+            retry_policy: Retry policy for API requests (default policy if omitted)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.retry = retry_policy if retry_policy is not None else RetryPolicy()
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28"
+        })
+
+    def _state_path(self, org_name: str) -> Path:
+        return self.output_dir / f"{org_name}_audit_log_state.json"
+
+    def _load_state(self, org_name: str) -> Dict[str, Any]:
+        """Load the saved cursor and the query it belongs to."""
+        path = self._state_path(org_name)
+        if not path.exists():
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _rotate(filepath: Path):
+        """Move an event file aside so a new export does not append to it."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        rotated = filepath.with_name(f"{filepath.stem}_{timestamp}{filepath.suffix}")
+        os.replace(filepath, rotated)
+        logger.warning(f"Moved events fetched with other filters to {rotated}")
+
+    def _save_state(self, org_name: str, state: Dict[str, Any]):
+        """Save the cursor atomically."""
+        path = self._state_path(org_name)
+        tmp = path.with_name(f".{path.name}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, path)
+
+    def _fetch_page(self, org_name: str, params: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Fetch one page of events.
+
+        Returns:
+            Tuple of (events, cursor for the next page or None)
+
+        Raises:
+            GithubException: On an error response (classified by the retry policy)
+        """
+        response = self.session.get(f"{self.base_url}/orgs/{org_name}/audit-log", params=params, timeout=60)
+        if response.status_code >= 400:
+            try:
+                data = response.json()
+            except ValueError:
+                data = response.text
+            raise GithubException(response.status_code, data, dict(response.headers))
+
+        next_url = response.links.get("next", {}).get("url")
+        after = parse_qs(urlparse(next_url).query).get("after", [None])[0] if next_url else None
+        return response.json(), after
+
+    def export(
+        self,
+        org_name: str,
+        output_format: str = "ndjson",
+        phrase: str = "",
+        include: str = "all",
+        full: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Export audit log events that are new since the last run.
+
+        Pages are requested oldest first. After each page the events are
+        written and flushed, then the cursor is saved, so no page is ever
+        held in memory beyond the one being written. If the filters or
+        format changed since the last run (or its cursor is missing), the
+        existing event file is renamed with a timestamp and a new one is
+        started, so one file only holds events of one query.
+
+        Args:
+            org_name: Organization name
+            output_format: 'ndjson' or 'sqlite'
+            phrase: Search phrase for server-side filtering
+            include: Event sources: 'web', 'git' or 'all'
+            full: Ignore the saved cursor and start from the beginning
+
+        Returns:
+            Dictionary with the output path, number of new events and pages
+        """
+        extension = "ndjson" if output_format == "ndjson" else "sqlite"
+        filepath = self.output_dir / f"{org_name}_audit_log.{extension}"
+        query = {"phrase": phrase, "include": include, "format": output_format}
+        saved = self._load_state(org_name)
+        same_query = bool(saved) and all(saved.get(key) == value for key, value in query.items())
+        if saved and not same_query:
+            logger.warning("Audit log filters or format changed since the last run; starting from the beginning")
+        if filepath.exists() and not same_query:
+            self._rotate(filepath)
+        elif full and filepath.exists() and output_format == "ndjson":
+            filepath.unlink()
+        state = saved if same_query and not full else {}
+
+        after = state.get("after")
+        seen = set(state.get("seen", []))
+        if after:
+            logger.info("Resuming audit log export from saved cursor")
+
+        sink = SINKS[output_format](filepath)
+        written = 0
+        pages = 0
+        try:
+            while True:
+                params = {"phrase": phrase, "include": include, "order": "asc", "per_page": PER_PAGE}
+                if after:
+                    params["after"] = after
+                events, next_after = self.retry.call(
+                    self._fetch_page, org_name, params,
+                    description=f"audit log (page {pages + 1})"
+                )
+                pages += 1
+
+                new_events = [event for event in events if event.get("_document_id") not in seen]
+                sink.write(new_events)
+                sink.flush()
+                written += len(new_events)
+                logger.debug(f"Audit log page {pages}: {len(new_events)} new events")
+
+                if next_after is None or not events:
+                    # Re-read this page next time, skipping the events seen on it
+                    self._save_state(org_name, dict(
+                        query,
+                        after=after,
+                        seen=[event.get("_document_id") for event in events]
+                    ))
+                    break
+
+                after = next_after
+                seen = set()
+                self._save_state(org_name, dict(query, after=after, seen=[]))
+        finally:
+            sink.close()
+
+        logger.info(f"Exported {written} new audit log events from {org_name} to {filepath}")
+        return {"path": str(filepath), "events": written, "pages": pages}
+
+    def close(self):
+        """Close the HTTP session."""
+        self.session.close()
@@ -0,0 +1,586 @@
+"""
+Bounded-memory comparison of two exports.
+
+Exports are read as streams (JSON exports section by section, CSV and
+NDJSON sets file by file), sorted by key with an external merge sort and
+compared with a sort-merge join on user ID, team ID and the
+(team_id, user_id) pair. Changes are spooled to temporary files, so memory
+use depends on the sort buffer size rather than on the size of the exports.
+"""
+
+import csv
+import glob
+import heapq
+import json
+import logging
+import re
+import tempfile
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sort key fields for each entity
+ENTITY_KEYS = {
+    "members": ("id",),
+    "teams": ("id",),
+    "team_memberships": ("team_id", "user_id"),
+}
+
+# Fields that change too often to be reported as changes
+IGNORED_FIELDS = {"updated_at"}
+
+# Team fields that identify a team to people
+TEAM_NAME_FIELDS = ("name", "slug")
+
+# Records held in memory per sorted run
+DEFAULT_BUFFER_SIZE = 100000
+
+_SET_FILE_PATTERN = re.compile(
+    r"^(?P<prefix>.+)_(?P<entity>team_memberships|members|teams|organization)"
+    r"_(?P<timestamp>\d{8}_\d{6})\.(?P<ext>csv|ndjson)$"
+)
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class _JSONStream:
+    """Minimal incremental reader for the top level of a JSON document."""
+
+    def __init__(self, f: TextIO, chunk_size: int = 1 << 20):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        """Consume the next non-whitespace character, which must be char."""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed JSON export: expected '{char}', found '{found}'")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode and consume the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self._buf) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def items(self) -> Iterator[Any]:
+        """Decode and consume a JSON array one item at a time."""
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self._pos += 1
+            else:
+                self.expect("]")
+                return
+
+
+def iter_json_section(path: str, key: str) -> Iterator[Any]:
+    """
+    Stream one top-level section of a JSON export.
+
+    Arrays are yielded item by item; any other value is yielded once.
+    Sections before the requested one are skipped item by item.
+
+    Args:
+        path: Path to the JSON export
+        key: Top-level key to read
+
+    Yields:
+        Array items, or the section value
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        stream = _JSONStream(f)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            name = stream.value()
+            stream.expect(":")
+            is_array = stream.peek() == "["
+            if name == key:
+                if is_array:
+                    yield from stream.items()
+                else:
+                    yield stream.value()
+                return
+            if is_array:
+                for _ in stream.items():
+                    pass
+            else:
+                stream.value()
+            if stream.peek() != ",":
+                return
+            stream.expect(",")
+
+
+def _set_file(directory: Path, prefix: str, entity: str, timestamp: str, ext: str) -> Path:
+    """
+    Find an entity's file in an export set.
+
+    Unchanged CSV files are not rewritten, so a set can combine files from
+    several runs: the entity's file is the newest one written at or before
+    the given timestamp.
+
+    Args:
+        directory: Export directory
+        prefix: Export name (filename prefix)
+        entity: Entity name
+        timestamp: Timestamp of the file the set was named by
+        ext: File extension
+
+    Returns:
+        Path of the entity's file (which may not exist)
+    """
+    exact = directory / f"{prefix}_{entity}_{timestamp}.{ext}"
+    if exact.exists():
+        return exact
+    pattern = re.compile(rf"{re.escape(prefix)}_{entity}_(\d{{8}}_\d{{6}})\.{ext}")
+    candidates = []
+    for candidate in directory.glob(f"{glob.escape(prefix)}_{entity}_*.{ext}"):
+        match = pattern.fullmatch(candidate.name)
+        if match and match.group(1) <= timestamp:
+            candidates.append((match.group(1), candidate))
+    return max(candidates)[1] if candidates else exact
+
+
+class ExportReader:
+    """Streaming reader for a JSON export or a CSV/NDJSON export set."""
+
+    def __init__(self, path: str):
+        """
+        Initialize export reader.
+
+        Args:
+            path: A JSON export file, any file of a CSV or NDJSON set
+                (for example ``{org}_members_{timestamp}.csv``), or a
+                ``{org}_latest.json`` manifest
+
+        Raises:
+            ValueError: If the path is not a recognized export
+        """
+        self.path = path
+        name = Path(path).name
+        if name.endswith("_latest.json"):
+            self._init_from_manifest(Path(path))
+            return
+        if name.endswith(".json"):
+            self.format = "json"
+            self._files: Dict[str, Path] = {}
+            return
+
+        match = _SET_FILE_PATTERN.match(name)
+        if not match:
+            raise ValueError(
+                f"Unrecognized export file: {path} "
+                "(expected a .json export or a file named {org}_{entity}_{timestamp}.csv/.ndjson)"
+            )
+        self.format = match.group("ext")
+        directory = Path(path).parent
+        self._files = {
+            entity: _set_file(directory, match.group("prefix"), entity, match.group("timestamp"), self.format)
+            for entity in ("organization", "members", "teams", "team_memberships")
+        }
+
+    def _init_from_manifest(self, manifest_path: Path):
+        """Read the latest export files listed in an output manifest."""
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            files = json.load(f).get("files", {})
+        directory = manifest_path.parent
+        if "json" in files:
+            self.path = str(directory / files["json"]["path"])
+            self.format = "json"
+            self._files = {}
+            return
+        self.format = "csv"
+        self._files = {
+            entity: directory / files.get(f"{entity}.csv", {}).get("path", f"missing_{entity}.csv")
+            for entity in ("organization", "members", "teams", "team_memberships")
+        }
+
+    def _iter_file(self, entity: str) -> Iterator[Dict[str, Any]]:
+        filepath = self._files[entity]
+        if not filepath.exists():
+            logger.warning(f"Export file not found, treating as empty: {filepath}")
+            return
+        with open(filepath, "r", newline="", encoding="utf-8") as f:
+            if self.format == "csv":
+                yield from csv.DictReader(f)
+            else:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def iter_records(self, entity: str) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the records of one entity type.
+
+        Args:
+            entity: 'members', 'teams' or 'team_memberships'
+
+        Yields:
+            Record dictionaries
+        """
+        if self.format == "json":
+            yield from iter_json_section(self.path, entity)
+        else:
+            yield from self._iter_file(entity)
+
+    def organization(self) -> Dict[str, Any]:
+        """Read the organization info of the export."""
+        if self.format == "json":
+            return next(iter_json_section(self.path, "organization"), {})
+        return next(self._iter_file("organization"), {})
+
+
+def _normalize(value: Any) -> str:
+    """Normalize a field value so JSON and CSV sources compare equal."""
+    return "" if value is None else str(value)
+
+
+def _key_func(entity: str) -> Callable[[Dict[str, Any]], Tuple[int, ...]]:
+    fields = ENTITY_KEYS[entity]
+    return lambda record: tuple(int(record[field]) for field in fields)
+
+
+def _spill(buffer: List[Tuple[Tuple[int, ...], Dict[str, Any]]]) -> TextIO:
+    """Write a sorted run to a temporary file."""
+    buffer.sort(key=itemgetter(0))
+    run = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+    for key, record in buffer:
+        run.write(json.dumps([key, record], ensure_ascii=False) + "\n")
+    run.seek(0)
+    return run
+
+
+def _read_run(run: TextIO) -> Iterator[Tuple[Tuple[int, ...], Dict[str, Any]]]:
+    for line in run:
+        key, record = json.loads(line)
+        yield (tuple(key) if isinstance(key, list) else key), record
+    run.close()
+
+
+def external_sort(
+    records: Iterator[Dict[str, Any]],
+    key: Callable[[Dict[str, Any]], Any],
+    buffer_size: int = DEFAULT_BUFFER_SIZE
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """
+    Sort records by key using bounded memory.
+
+    Records are sorted in runs of ``buffer_size`` that are spilled to
+    temporary files and merged lazily.
+
+    Args:
+        records: Records to sort
+        key: Function returning a record's sort key
+        buffer_size: Records held in memory per run
+
+    Yields:
+        (key, record) tuples in key order
+    """
+    runs = []
+    buffer = []
+    for record in records:
+        buffer.append((key(record), record))
+        if len(buffer) >= buffer_size:
+            runs.append(_spill(buffer))
+            buffer = []
+
+    if not runs:
+        buffer.sort(key=itemgetter(0))
+        yield from buffer
+        return
+
+    if buffer:
+        runs.append(_spill(buffer))
+    yield from heapq.merge(*(_read_run(run) for run in runs), key=itemgetter(0))
+
+
+def _dedupe(pairs: Iterator[Tuple[Any, Dict[str, Any]]]) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Drop records whose key repeats the previous one in a sorted stream."""
+    previous = object()
+    for key, record in pairs:
+        if key != previous:
+            yield key, record
+        previous = key
+
+
+def merge_join(
+    base: Iterator[Tuple[Any, Dict[str, Any]]],
+    target: Iterator[Tuple[Any, Dict[str, Any]]]
+) -> Iterator[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+    """
+    Full outer join of two key-sorted streams.
+
+    Args:
+        base: Sorted (key, record) pairs from the base export
+        target: Sorted (key, record) pairs from the target export
+
+    Yields:
+        (base_record, target_record) pairs; one side is None when the key
+        exists in only one export
+    """
+    base, target = _dedupe(base), _dedupe(target)
+    a = next(base, None)
+    b = next(target, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a[0] < b[0]):
+            yield a[1], None
+            a = next(base, None)
+        elif a is None or b[0] < a[0]:
+            yield None, b[1]
+            b = next(target, None)
+        else:
+            yield a[1], b[1]
+            a = next(base, None)
+            b = next(target, None)
+
+
+def changed_fields(base: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """
+    Compare two versions of a record.
+
+    Args:
+        base: Record from the base export
+        target: Record from the target export
+
+    Returns:
+        Mapping of changed field name to [old value, new value]
+    """
+    changes = {}
+    for field in base.keys() | target.keys():
+        if field in IGNORED_FIELDS:
+            continue
+        old, new = base.get(field), target.get(field)
+        if _normalize(old) != _normalize(new):
+            changes[field] = [old, new]
+    return changes
+
+
+class _Spool:
+    """Temporary NDJSON file collecting one category of changes."""
+
+    def __init__(self):
+        self.count = 0
+        self._file = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+
+    def add(self, item: Dict[str, Any]):
+        self._file.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        self._file.seek(0)
+        for line in self._file:
+            yield json.loads(line)
+
+    def close(self):
+        self._file.close()
+
+
+class DiffReport:
+    """Structured change report between two exports."""
+
+    CATEGORIES = (
+        "members_joined", "members_left", "members_changed",
+        "teams_added", "teams_removed", "teams_renamed", "teams_reparented", "teams_changed",
+        "memberships_added", "memberships_removed", "memberships_changed",
+        "team_moves"
+    )
+
+    def __init__(self, base: str, target: str):
+        """
+        Initialize an empty report.
+
+        Args:
+            base: Path of the base (older) export
+            target: Path of the target (newer) export
+        """
+        self.base = base
+        self.target = target
+        self.spools = {category: _Spool() for category in self.CATEGORIES}
+
+    def add(self, category: str, item: Dict[str, Any]):
+        """Record one change."""
+        self.spools[category].add(item)
+
+    def summary(self) -> Dict[str, int]:
+        """Number of changes in each category."""
+        return {category: spool.count for category, spool in self.spools.items()}
+
+    def to_export(self) -> Dict[str, Any]:
+        """
+        Report as a dictionary whose change lists are streamed from disk.
+
+        Returns:
+            Dictionary suitable for ``exporters.write_json``
+        """
+        report: Dict[str, Any] = {
+            "base": self.base,
+            "target": self.target,
+            "summary": self.summary()
+        }
+        report.update(self.spools)
+        return report
+
+    def close(self):
+        """Delete the temporary change files."""
+        for spool in self.spools.values():
+            spool.close()
+
+
+def _sorted(reader: ExportReader, entity: str, buffer_size: int):
+    return external_sort(reader.iter_records(entity), _key_func(entity), buffer_size)
+
+
+def diff_exports(base_path: str, target_path: str, buffer_size: int = DEFAULT_BUFFER_SIZE) -> DiffReport:
+    """
+    Compare two exports.
+
+    Reports members who joined, left or changed, teams that were added,
+    removed, renamed, moved to another parent or otherwise changed,
+    membership edges that were added, removed or changed role, and users
+    who moved between teams (lost at least one team and gained another).
+
+    Args:
+        base_path: Base (older) export
+        target_path: Target (newer) export
+        buffer_size: Records held in memory per sorted run
+
+    Returns:
+        DiffReport (call ``close()`` when done)
+    """
+    base = ExportReader(base_path)
+    target = ExportReader(target_path)
+    report = DiffReport(base_path, target_path)
+
+    for old, new in merge_join(_sorted(base, "members", buffer_size), _sorted(target, "members", buffer_size)):
+        if old is None:
+            report.add("members_joined", new)
+        elif new is None:
+            report.add("members_left", old)
+        else:
+            changes = changed_fields(old, new)
+            if changes:
+                report.add("members_changed", {"id": new["id"], "login": new.get("login"), "changes": changes})
+
+    for old, new in merge_join(_sorted(base, "teams", buffer_size), _sorted(target, "teams", buffer_size)):
+        if old is None:
+            report.add("teams_added", new)
+            continue
+        if new is None:
+            report.add("teams_removed", old)
+            continue
+        changes = changed_fields(old, new)
+        if not changes:
+            continue
+        team = {"id": new["id"], "name": new.get("name")}
+        renamed = {field: changes.pop(field) for field in TEAM_NAME_FIELDS if field in changes}
+        if renamed:
+            report.add("teams_renamed", dict(team, changes=renamed))
+        reparented = {field: changes.pop(field) for field in ("parent_id", "parent_name") if field in changes}
+        if "parent_id" in reparented:
+            report.add("teams_reparented", dict(team, changes=reparented))
+        if changes:
+            report.add("teams_changed", dict(team, changes=changes))
+
+    # Membership edges that changed, kept aside to detect team moves
+    edge_changes = _Spool()
+    memberships = merge_join(
+        _sorted(base, "team_memberships", buffer_size),
+        _sorted(target, "team_memberships", buffer_size)
+    )
+    for old, new in memberships:
+        if old is None:
+            report.add("memberships_added", new)
+            edge_changes.add({"change": "added", **new})
+        elif new is None:
+            report.add("memberships_removed", old)
+            edge_changes.add({"change": "removed", **old})
+        elif _normalize(old.get("role")) != _normalize(new.get("role")):
+            report.add("memberships_changed", dict(new, changes={"role": [old.get("role"), new.get("role")]}))
+
+    _detect_team_moves(edge_changes, report, buffer_size)
+    edge_changes.close()
+
+    logger.info(f"Diff completed: {report.summary()}")
+    return report
+
+
+def _detect_team_moves(edge_changes: _Spool, report: DiffReport, buffer_size: int):
+    """Group changed membership edges by user and report team moves."""
+    by_user = external_sort(iter(edge_changes), lambda edge: int(edge["user_id"]), buffer_size)
+
+    def flush(user_id, login, removed, added):
+        if removed and added:
+            report.add("team_moves", {
+                "user_id": user_id,
+                "user_login": login,
+                "from_teams": removed,
+                "to_teams": added
+            })
+
+    current, login, removed, added = None, None, [], []
+    for user_id, edge in by_user:
+        if user_id != current:
+            flush(current, login, removed, added)
+            current, login, removed, added = user_id, edge.get("user_login"), [], []
+        team = edge.get("team_name") or edge.get("team_id")
+        (added if edge["change"] == "added" else removed).append(team)
+    flush(current, login, removed, added)
+
+
+def print_diff_summary(report: DiffReport):
+    """
+    Print the number of changes in each category.
+
+    Args:
+        report: Diff report
+    """
+    print("\n" + "=" * 60)
+    print("Export Diff")
+    print("=" * 60)
+    print(f"Base:   {report.base}")
+    print(f"Target: {report.target}\n")
+    for category, count in report.summary().items():
+        label = category.replace("_", " ").capitalize() + ":"
+        print(f"{label:<24}{count:>10}")
+    print("=" * 60)
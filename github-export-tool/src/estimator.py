@@ -0,0 +1,417 @@
+"""
+Pre-flight cost estimation and fetch strategy selection.
+
+A handful of cheap API calls (member and team counts, a sample of team
+sizes and the current rate limit) are used to estimate how many requests
+an export will make, how many rate-limit windows it spans and how long it
+will take. The estimate then drives the choice of fetch strategy.
+"""
+
+import logging
+import math
+import time
+from typing import Any, Dict, Optional
+
+from retry import FETCH_ERRORS
+
+logger = logging.getLogger(__name__)
+
+# Largest page size accepted by the GitHub REST API
+MAX_PER_PAGE = 100
+
+# GitHub's secondary rate limit allows roughly 900 REST requests per minute
+SECONDARY_LIMIT_PER_SECOND = 15.0
+
+# Never run more concurrent requests than this
+MAX_CONCURRENCY = 8
+
+# Below this many requests, concurrency is not worth the extra load
+MIN_CALLS_FOR_CONCURRENCY = 200
+
+# Length of a primary rate-limit window in seconds
+RATE_LIMIT_WINDOW = 3600
+
+
+class FetchStrategy:
+    """How the client fetches data from the API."""
+
+    def __init__(self, per_page: int = MAX_PER_PAGE, lite_fields: bool = False, concurrency: int = 1):
+        """
+        Initialize fetch strategy.
+
+        Args:
+            per_page: Page size for list requests
+            lite_fields: Only export fields included in list responses,
+                skipping the per-member and per-team detail requests
+            concurrency: Number of requests made in parallel
+        """
+        self.per_page = per_page
+        self.lite_fields = lite_fields
+        self.concurrency = max(1, concurrency)
+
+    def describe(self) -> str:
+        """Short human-readable description of the strategy."""
+        fields = "lite fields" if self.lite_fields else "full fields"
+        return f"REST, {fields}, {self.per_page} per page, concurrency {self.concurrency}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the strategy to a dictionary."""
+        return {
+            "per_page": self.per_page,
+            "lite_fields": self.lite_fields,
+            "concurrency": self.concurrency
+        }
+
+
+class CostEstimate:
+    """Estimated size and cost of exporting an organization."""
+
+    def __init__(
+        self,
+        members: int,
+        teams: int,
+        memberships: int,
+        membership_pages: int,
+        remaining: int,
+        limit: int,
+        reset_in: float,
+        latency: float,
+        probe_calls: int,
+        repo_pages: Optional[int] = None
+    ):
+        """
+        Initialize cost estimate.
+
+        Args:
+            members: Number of organization members
+            teams: Number of teams
+            memberships: Estimated total team memberships
+            membership_pages: Estimated team member list pages at MAX_PER_PAGE
+            remaining: Remaining core API requests
+            limit: Core API requests per window
+            reset_in: Seconds until the rate limit resets
+            latency: Average seconds per request observed while probing
+            probe_calls: Requests made to produce this estimate
+            repo_pages: Estimated team repository list pages at MAX_PER_PAGE
+                (None if team repositories are not exported)
+        """
+        self.members = members
+        self.teams = teams
+        self.memberships = memberships
+        self.membership_pages = membership_pages
+        self.remaining = remaining
+        self.limit = limit
+        self.reset_in = reset_in
+        self.latency = latency
+        self.probe_calls = probe_calls
+        self.repo_pages = repo_pages
+
+    def scaled(self, fraction: float) -> "CostEstimate":
+        """
+        Estimate for exporting a fraction of the organization (one shard).
+
+        Args:
+            fraction: Share of members, teams and memberships exported
+
+        Returns:
+            Scaled CostEstimate
+        """
+        return CostEstimate(
+            members=math.ceil(self.members * fraction),
+            teams=math.ceil(self.teams * fraction),
+            memberships=math.ceil(self.memberships * fraction),
+            membership_pages=math.ceil(self.membership_pages * fraction),
+            remaining=self.remaining,
+            limit=self.limit,
+            reset_in=self.reset_in,
+            latency=self.latency,
+            probe_calls=self.probe_calls,
+            repo_pages=None if self.repo_pages is None else math.ceil(self.repo_pages * fraction)
+        )
+
+    def api_calls(self, strategy: FetchStrategy) -> int:
+        """
+        Estimate the number of API requests an export will make.
+
+        Args:
+            strategy: Fetch strategy to estimate for
+
+        Returns:
+            Estimated request count
+        """
+        def pages(count: int) -> int:
+            return max(1, math.ceil(count / strategy.per_page))
+
+        # Member and team lists; teams are listed again for memberships
+        calls = pages(self.members) + 2 * pages(self.teams)
+
+        # Team member lists, scaled from the sample taken at MAX_PER_PAGE
+        calls += max(self.teams, self.membership_pages * MAX_PER_PAGE // strategy.per_page)
+
+        if self.repo_pages is not None:
+            # Teams are listed once more, then each team's repository pages
+            # (an upper bound: unchanged teams are served from the cache)
+            calls += pages(self.teams) + max(self.teams, self.repo_pages * MAX_PER_PAGE // strategy.per_page)
+
+        if not strategy.lite_fields:
+            # One detail request per member profile and per team
+            calls += self.members + self.teams
+        return calls
+
+    def rate_limit_windows(self, strategy: FetchStrategy) -> int:
+        """
+        Number of rate-limit resets the export has to wait for.
+
+        Args:
+            strategy: Fetch strategy to estimate for
+
+        Returns:
+            Number of windows beyond the current one
+        """
+        overflow = self.api_calls(strategy) - self.remaining
+        if overflow <= 0:
+            return 0
+        return math.ceil(overflow / max(1, self.limit))
+
+    def wall_time(self, strategy: FetchStrategy) -> float:
+        """
+        Estimate the export's wall-clock time in seconds.
+
+        Args:
+            strategy: Fetch strategy to estimate for
+
+        Returns:
+            Estimated seconds, including rate-limit waits
+        """
+        request_time = self.api_calls(strategy) * self.latency / strategy.concurrency
+        windows = self.rate_limit_windows(strategy)
+        if windows == 0:
+            return request_time
+        wait_time = self.reset_in + (windows - 1) * RATE_LIMIT_WINDOW
+        return max(request_time, wait_time + request_time / (windows + 1))
+
+    def to_dict(self, strategy: FetchStrategy) -> Dict[str, Any]:
+        """
+        Convert the estimate to a dictionary.
+
+        Args:
+            strategy: Fetch strategy the estimate applies to
+
+        Returns:
+            Dictionary with counts, rate limit and cost figures
+        """
+        return {
+            "members": self.members,
+            "teams": self.teams,
+            "memberships": self.memberships,
+            "rate_limit_remaining": self.remaining,
+            "rate_limit": self.limit,
+            "api_calls": self.api_calls(strategy),
+            "rate_limit_windows": self.rate_limit_windows(strategy),
+            "wall_time_seconds": round(self.wall_time(strategy), 1),
+            "strategy": strategy.to_dict()
+        }
+
+
+def _format_duration(seconds: float) -> str:
+    """Format a duration in seconds as a short human-readable string."""
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def estimate_cost(
+    client,
+    org_name: str,
+    sample_size: int = 20,
+    team_repos: bool = False,
+    team_slug: Optional[str] = None,
+    include_descendants: bool = False
+) -> Optional[CostEstimate]:
+    """
+    Estimate the cost of exporting an organization with a few cheap calls.
+
+    Member and team counts come from list requests; total memberships are
+    extrapolated from the ``members_count`` of a sample of teams, and team
+    repository pages from their ``repos_count``.
+
+    Args:
+        client: Connected GitHubClient
+        org_name: Organization name
+        sample_size: Number of teams whose size is sampled
+        team_repos: Include team repository requests in the estimate
+        team_slug: Estimate a subtree export rooted at this team
+        include_descendants: With team_slug, include the teams below it
+
+    Returns:
+        CostEstimate, or None if the organization (or team) could not be read
+    """
+    start = time.monotonic()
+    calls = 0
+
+    org = client.get_organization(org_name)
+    if not org:
+        return None
+    calls += 1
+
+    members = client.retry.call(lambda: org.get_members().totalCount, description="member count")
+    calls += 1
+
+    teams_list = org.get_teams()
+    first_page = client.retry.call(teams_list.get_page, 0, description="teams (page 1)")
+    calls += 1
+    if len(first_page) < client.github.per_page:
+        teams = len(first_page)
+    else:
+        teams = client.retry.call(lambda: teams_list.totalCount, description="team count")
+        calls += 1
+
+    sample = first_page[:sample_size]
+    sizes = []
+    repo_counts = []
+    for team in sample:
+        sizes.append(client.retry.call(getattr, team, "members_count", description=f"team {team.name}") or 0)
+        # The team is complete now, so this costs no extra request
+        repo_counts.append(team.repos_count or 0)
+        calls += 1
+
+    if sizes:
+        scale = teams / len(sizes)
+        memberships = round(sum(sizes) * scale)
+        membership_pages = round(sum(max(1, math.ceil(s / MAX_PER_PAGE)) for s in sizes) * scale)
+        repo_pages = round(sum(max(1, math.ceil(r / MAX_PER_PAGE)) for r in repo_counts) * scale)
+    else:
+        memberships = membership_pages = repo_pages = 0
+
+    latency = (time.monotonic() - start) / calls
+
+    rate_limit = client.github.get_rate_limit().core
+    reset_in = max(0.0, rate_limit.reset.timestamp() - time.time())
+
+    estimate = CostEstimate(
+        members=members,
+        teams=teams,
+        memberships=memberships,
+        membership_pages=membership_pages,
+        remaining=rate_limit.remaining,
+        limit=rate_limit.limit,
+        reset_in=reset_in,
+        latency=latency,
+        probe_calls=calls,
+        repo_pages=repo_pages if team_repos else None
+    )
+    if team_slug is not None:
+        estimate = _subtree_estimate(client, org, estimate, team_slug, include_descendants, team_repos)
+        if estimate is None:
+            return None
+
+    logger.info(f"Estimated export cost for {org_name}: {estimate.to_dict(FetchStrategy())}")
+    return estimate
+
+
+def _subtree_estimate(
+    client,
+    org,
+    estimate: CostEstimate,
+    team_slug: str,
+    include_descendants: bool,
+    team_repos: bool
+) -> Optional[CostEstimate]:
+    """
+    Narrow an organization estimate to one team subtree.
+
+    A single team is estimated from its own member and repository counts.
+    With descendants, the organization estimate is scaled by the root
+    team's share of members (team member lists include child team members).
+
+    Returns:
+        CostEstimate, or None if the team could not be read
+    """
+    try:
+        team = client.retry.call(org.get_team_by_slug, team_slug, description=f"team {team_slug}")
+    except FETCH_ERRORS as e:
+        logger.error(f"Failed to get team {team_slug}: {e}")
+        return None
+    members = team.members_count or 0
+
+    if include_descendants:
+        subtree = estimate.scaled(min(1.0, members / max(1, estimate.members)))
+        subtree.probe_calls += 1
+        return subtree
+
+    return CostEstimate(
+        members=members,
+        teams=1,
+        memberships=members,
+        membership_pages=max(1, math.ceil(members / MAX_PER_PAGE)),
+        remaining=estimate.remaining,
+        limit=estimate.limit,
+        reset_in=estimate.reset_in,
+        latency=estimate.latency,
+        probe_calls=estimate.probe_calls + 1,
+        repo_pages=max(1, math.ceil((team.repos_count or 0) / MAX_PER_PAGE)) if team_repos else None
+    )
+
+
+def select_strategy(
+    estimate: CostEstimate,
+    fields: str = "auto",
+    concurrency: Optional[int] = None
+) -> FetchStrategy:
+    """
+    Pick the fetch strategy for an export.
+
+    Full fields are used unless lite fields avoid waiting for at least one
+    rate-limit reset. Concurrency is sized to stay under GitHub's secondary
+    rate limit at the observed request latency.
+
+    Args:
+        estimate: Pre-flight cost estimate
+        fields: 'full', 'lite' or 'auto'
+        concurrency: Fixed concurrency level (chosen automatically if None)
+
+    Returns:
+        Selected FetchStrategy
+    """
+    full = FetchStrategy(lite_fields=False)
+    lite = FetchStrategy(lite_fields=True)
+
+    if fields == "full":
+        strategy = full
+    elif fields == "lite":
+        strategy = lite
+    elif estimate.rate_limit_windows(lite) < estimate.rate_limit_windows(full):
+        strategy = lite
+    else:
+        strategy = full
+
+    if concurrency is not None:
+        strategy.concurrency = max(1, concurrency)
+    elif estimate.api_calls(strategy) >= MIN_CALLS_FOR_CONCURRENCY:
+        strategy.concurrency = max(1, min(MAX_CONCURRENCY, round(SECONDARY_LIMIT_PER_SECOND * estimate.latency)))
+
+    return strategy
+
+
+def print_estimate(estimate: CostEstimate, strategy: FetchStrategy):
+    """
+    Print a pre-flight cost estimate.
+
+    Args:
+        estimate: Pre-flight cost estimate
+        strategy: Selected fetch strategy
+    """
+    print("\n" + "=" * 60)
+    print("Export Estimate")
+    print("=" * 60)
+    print(f"Members:               {estimate.members:>10}")
+    print(f"Teams:                 {estimate.teams:>10}")
+    print(f"Memberships (approx.): {estimate.memberships:>10}")
+    print(f"\nAPI calls:             {estimate.api_calls(strategy):>10}")
+    print(f"Rate limit remaining:  {estimate.remaining:>10}/{estimate.limit}")
+    print(f"Rate-limit windows:    {estimate.rate_limit_windows(strategy) + 1:>10}")
+    print(f"Expected wall time:    {_format_duration(estimate.wall_time(strategy)):>10}")
+    print(f"\nStrategy: {strategy.describe()}")
+    print("=" * 60)
@@ -4,13 +4,277 @@ Export functionality for GitHub data in JSON and CSV formats.
 
 import json
 import csv
+import hashlib
 import logging
-from typing import Dict, Any, List
+import os
+from typing import Dict, Any, List, Optional, Collection, TextIO, Tuple
 from pathlib import Path
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Top-level keys that describe the run rather than the exported data;
+# they are written but not included in the content hash
+VOLATILE_KEYS = ("export_status",)
+
+
+class _HashingWriter:
+    """Text file wrapper that computes a SHA-256 of what is written."""
+    
+    def __init__(self, f: TextIO):
+        self._f = f
+        self._sha256 = hashlib.sha256()
+        self.paused = False
+    
+    def write(self, text: str) -> int:
+        self._f.write(text)
+        if not self.paused:
+            self._sha256.update(text.encode("utf-8"))
+        return len(text)
+    
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
+
+
+def _dumps(value: Any, level: int) -> str:
+    """Encode a value as indented JSON nested ``level`` levels deep."""
+    if hasattr(value, "to_dict"):
+        value = value.to_dict()
+    try:
+        text = json.dumps(value, indent=2, ensure_ascii=False)
+    except RecursionError:
+        # Nested deeper than the recursion limit (such as a deep team hierarchy)
+        text = _dumps_deep(value)
+    return text.replace("\n", "\n" + "  " * level)
+
+
+def _dumps_deep(value: Any) -> str:
+    """Encode a value like ``json.dumps(value, indent=2)`` with an explicit stack."""
+    parts: List[str] = []
+    # Entries are (text, None, 0) to write as is or (None, value, depth) to encode
+    stack: List[Tuple[Optional[str], Any, int]] = [(None, value, 0)]
+    while stack:
+        text, item, depth = stack.pop()
+        if text is not None:
+            parts.append(text)
+        elif isinstance(item, (dict, list, tuple)) and item:
+            is_dict = isinstance(item, dict)
+            indent = "\n" + "  " * (depth + 1)
+            entries = list(item.items()) if is_dict else [(None, child) for child in item]
+            # Pushed in reverse: each prefix is popped before its value
+            stack.append(("\n" + "  " * depth + ("}" if is_dict else "]"), None, 0))
+            for i in range(len(entries) - 1, -1, -1):
+                key, child = entries[i]
+                prefix = ("," if i else "{" if is_dict else "[") + indent
+                if is_dict:
+                    name = key if isinstance(key, str) else json.dumps(key)
+                    prefix += json.dumps(name, ensure_ascii=False) + ": "
+                stack.append((None, child, depth + 1))
+                stack.append((prefix, None, 0))
+        else:
+            parts.append(json.dumps(item, ensure_ascii=False))
+    return "".join(parts)
+
+
+def write_json(data: Dict[str, Any], f: TextIO, volatile_keys: Collection[str] = ()) -> None:
+    """
+    Write export data as indented JSON, one record at a time.
+    
+    Produces the same output as ``json.dump(data, f, indent=2)``, but
+    entity sequences (such as record views) are expanded and encoded
+    item by item instead of being materialized as one large list.
+    
+    Args:
+        data: Data dictionary to export
+        f: Open text file to write to
+        volatile_keys: Top-level keys left out of the content hash when
+            writing through a hashing writer
+    """
+    hashing = isinstance(f, _HashingWriter)
+    f.write("{")
+    for i, (key, value) in enumerate(data.items()):
+        if hashing:
+            f.paused = key in volatile_keys
+        f.write(",\n  " if i else "\n  ")
+        f.write(json.dumps(key, ensure_ascii=False) + ": ")
+        _write_value(value, f, 1)
+    if hashing:
+        f.paused = False
+    f.write("\n}" if data else "}")
+
+
+def _is_lazy(value: Any) -> bool:
+    """True for iterables that ``json`` cannot encode, such as record views."""
+    return hasattr(value, "__iter__") and not isinstance(value, (dict, list, tuple, str))
+
+
+def _write_value(value: Any, f: TextIO, level: int) -> None:
+    """
+    Write a value nested ``level`` levels deep, streaming sequences.
+    
+    Top-level sequences are written item by item, as are sequences inside
+    dictionaries that hold any lazy sequence (such as the analytics
+    tables); everything else is encoded in one piece.
+    """
+    indent = "\n" + "  " * level
+    if isinstance(value, dict) and any(_is_lazy(item) for item in value.values()):
+        for i, (key, item) in enumerate(value.items()):
+            f.write("," + indent + "  " if i else "{" + indent + "  ")
+            f.write(json.dumps(key, ensure_ascii=False) + ": ")
+            _write_value(item, f, level + 1)
+        f.write(indent + "}")
+    elif isinstance(value, (dict, str)) or not hasattr(value, "__iter__"):
+        f.write(_dumps(value, level))
+    else:
+        empty = True
+        for item in value:
+            f.write(("," if not empty else "[") + indent + "  ")
+            f.write(_dumps(item, level + 1))
+            empty = False
+        f.write("[]" if empty else indent + "]")
+
+
+def _temp_path(filepath: Path) -> Path:
+    """Hidden temporary path next to an output file."""
+    return filepath.with_name(f".{filepath.name}.tmp")
+
+
+class OutputManifest:
+    """
+    The ``{name}_latest.json`` manifest of the most recent export files.
+    
+    Records the path and content hash of each file of the latest export,
+    plus a combined content hash, so consumers can tell whether anything
+    changed without opening the exports. The file list is rebuilt on every
+    run from the files that run produced (written or kept unchanged); the
+    previous run's list is only used to detect unchanged content. The
+    manifest is only rewritten when its content changes.
+    """
+    
+    def __init__(self, output_dir: Path, name: str):
+        """
+        Load the manifest (or start an empty one).
+        
+        Args:
+            output_dir: Export directory
+            name: Export name (organization name)
+        """
+        self.output_dir = output_dir
+        self.path = output_dir / f"{name}_latest.json"
+        self._saved = None
+        self._previous: Dict[str, Dict[str, str]] = {}
+        self.data: Dict[str, Any] = {"name": name, "content_hash": None, "updated_at": None, "files": {}}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                self._saved = json.dumps(saved, sort_keys=True)
+                self._previous = saved.get("files", {})
+                self.data.update(content_hash=saved.get("content_hash"), updated_at=saved.get("updated_at"))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+    
+    def previous(self, entity: str) -> Optional[Tuple[Path, str]]:
+        """
+        Get the file recorded for an entity by the previous run, if it still exists.
+        
+        Args:
+            entity: Entity key (e.g. 'json', 'members.csv')
+            
+        Returns:
+            Tuple of (path, sha256) or None
+        """
+        entry = self._previous.get(entity)
+        if not entry:
+            return None
+        filepath = self.output_dir / entry["path"]
+        if not filepath.exists():
+            return None
+        return filepath, entry["sha256"]
+    
+    def record(self, entity: str, filepath: Path, digest: str):
+        """
+        Record a file of this run (newly written or kept unchanged).
+        
+        Args:
+            entity: Entity key
+            filepath: Path of the file
+            digest: SHA-256 of the file content
+        """
+        self.data["files"][entity] = {"path": filepath.name, "sha256": digest}
+    
+    def save(self) -> bool:
+        """
+        Write the manifest atomically if it changed.
+        
+        The combined content hash covers only the files of this run.
+        
+        Returns:
+            True if the manifest was written
+        """
+        files = self.data["files"]
+        combined = hashlib.sha256(
+            "".join(f"{entity}:{files[entity]['sha256']}\n" for entity in sorted(files)).encode("utf-8")
+        ).hexdigest()
+        if combined != self.data.get("content_hash"):
+            self.data["content_hash"] = combined
+            self.data["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        
+        if json.dumps(self.data, sort_keys=True) == self._saved:
+            return False
+        
+        tmp = _temp_path(self.path)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+        self._saved = json.dumps(self.data, sort_keys=True)
+        logger.info(f"Updated manifest: {self.path}")
+        return True
+
+
+def save_manifest(manifest: OutputManifest, data: Dict[str, Any]):
+    """
+    Save the manifest, unless the export is incomplete.
+    
+    An incomplete export's files are written, but the manifest keeps
+    pointing at the last complete export, so consumers watching it never
+    pick up partial data.
+    
+    Args:
+        manifest: Output manifest
+        data: Exported data dictionary
+    """
+    if data.get("export_status", {}).get("complete", True):
+        manifest.save()
+    else:
+        logger.warning(f"Export is incomplete; leaving {manifest.path} at the last complete export")
+
+
+def _finalize(tmp: Path, filepath: Path, digest: str, entity: str, manifest: OutputManifest) -> Tuple[str, bool]:
+    """
+    Move a finished temporary file into place unless its content is unchanged.
+    
+    Args:
+        tmp: Temporary file holding the new content
+        filepath: Final path for the new file
+        digest: SHA-256 of the new content
+        entity: Manifest entity key
+        manifest: Output manifest
+        
+    Returns:
+        Tuple of (path of the current file, True if a new file was written)
+    """
+    previous = manifest.previous(entity)
+    if previous and previous[1] == digest:
+        tmp.unlink()
+        manifest.record(entity, previous[0], digest)
+        logger.info(f"Content unchanged, keeping {previous[0]}")
+        return str(previous[0]), False
+    
+    os.replace(tmp, filepath)
+    manifest.record(entity, filepath, digest)
+    return str(filepath), True
+
 
 class JSONExporter:
     """Export data in JSON format."""
@@ -24,15 +288,24 @@ class JSONExporter:
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.unchanged_files: List[str] = []
         logger.info(f"JSON exporter initialized with output directory: {output_dir}")
     
-    def export(self, data: Dict[str, Any], org_name: str) -> str:
+    def export(self, data: Dict[str, Any], org_name: str, manifest: Optional[OutputManifest] = None) -> str:
         """
         Export data to JSON file.
         
+        The file is written through a temporary file and renamed into
+        place. If its content hash matches the latest export in the
+        manifest, the new file is discarded and the previous path is
+        returned (and listed in ``unchanged_files``).
+        
         Args:
             data: Data dictionary to export
             org_name: Organization name (used in filename)
+            manifest: Manifest shared with other formats of the same run,
+                saved by the caller (a manifest of this file alone is
+                saved if omitted)
             
         Returns:
             Path to exported file
@@ -40,15 +313,28 @@ class JSONExporter:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{org_name}_export_{timestamp}.json"
         filepath = self.output_dir / filename
+        tmp = _temp_path(filepath)
+        shared = manifest is not None
+        manifest = manifest if shared else OutputManifest(self.output_dir, org_name)
+        self.unchanged_files = []
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                writer = _HashingWriter(f)
+                write_json(data, writer, VOLATILE_KEYS)
+            
+            path, written = _finalize(tmp, filepath, writer.hexdigest(), "json", manifest)
+            if not written:
+                self.unchanged_files.append(path)
+            if not shared:
+                save_manifest(manifest, data)
             
-            logger.info(f"JSON export completed: {filepath}")
-            return str(filepath)
+            logger.info(f"JSON export completed: {path}")
+            return path
         except Exception as e:
             logger.error(f"Failed to export JSON: {e}")
+            if tmp.exists():
+                tmp.unlink()
             raise
 
 
@@ -64,21 +350,33 @@ class CSVExporter:
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.unchanged_files: List[str] = []
+        self._manifest: Optional[OutputManifest] = None
         logger.info(f"CSV exporter initialized with output directory: {output_dir}")
     
-    def export(self, data: Dict[str, Any], org_name: str) -> List[str]:
+    def export(self, data: Dict[str, Any], org_name: str, manifest: Optional[OutputManifest] = None) -> List[str]:
         """
         Export data to CSV files (separate file for each entity type).
         
+        Files whose content hash matches the latest export in the manifest
+        are not rewritten; the previous paths are returned instead (and
+        listed in ``unchanged_files``).
+        
         Args:
             data: Data dictionary to export
             org_name: Organization name (used in filename)
+            manifest: Manifest shared with other formats of the same run,
+                saved by the caller (a manifest of these files alone is
+                saved if omitted)
             
         Returns:
             List of paths to exported files
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         exported_files = []
+        self.unchanged_files = []
+        shared = manifest is not None
+        self._manifest = manifest if shared else OutputManifest(self.output_dir, org_name)
         
         # Export members
         if "members" in data and data["members"]:
@@ -95,22 +393,70 @@ class CSVExporter:
             filepath = self._export_memberships(data["team_memberships"], org_name, timestamp)
             exported_files.append(filepath)
         
+        # Export team repository permissions
+        if "team_repositories" in data and data["team_repositories"]:
+            filepath = self._export_team_repositories(data["team_repositories"], org_name, timestamp)
+            exported_files.append(filepath)
+        
+        # Export analytics tables
+        if "analytics" in data:
+            exported_files.extend(self._export_analytics(data["analytics"], org_name, timestamp))
+        
         # Export organization info
         if "organization" in data:
             filepath = self._export_organization(data["organization"], org_name, timestamp)
             exported_files.append(filepath)
         
-        logger.info(f"CSV export completed: {len(exported_files)} files created")
+        if not shared:
+            save_manifest(self._manifest, data)
+        self._manifest = None
+        logger.info(
+            f"CSV export completed: {len(exported_files) - len(self.unchanged_files)} files created, "
+            f"{len(self.unchanged_files)} unchanged"
+        )
         return exported_files
     
+    def _write_csv(self, entity: str, fieldnames: List[str], rows, org_name: str, timestamp: str) -> str:
+        """
+        Write rows to an entity CSV file atomically, skipping unchanged content.
+        
+        Args:
+            entity: Entity name used in the filename (e.g. 'members')
+            fieldnames: CSV columns
+            rows: Row dictionaries
+            org_name: Organization name (used in filename)
+            timestamp: Timestamp used in filename
+            
+        Returns:
+            Path to the current file for the entity
+        """
+        filepath = self.output_dir / f"{org_name}_{entity}_{timestamp}.csv"
+        tmp = _temp_path(filepath)
+        manifest = self._manifest or OutputManifest(self.output_dir, org_name)
+        
+        try:
+            with open(tmp, 'w', newline='', encoding='utf-8') as f:
+                hashing_writer = _HashingWriter(f)
+                writer = csv.DictWriter(hashing_writer, fieldnames=fieldnames, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(rows)
+            
+            path, written = _finalize(tmp, filepath, hashing_writer.hexdigest(), f"{entity}.csv", manifest)
+            if not written:
+                self.unchanged_files.append(path)
+            if self._manifest is None:
+                manifest.save()
+            return path
+        except Exception:
+            if tmp.exists():
+                tmp.unlink()
+            raise
+    
     def _export_members(self, members: List[Dict[str, Any]], org_name: str, timestamp: str) -> str:
         """Export members to CSV."""
-        filename = f"{org_name}_members_{timestamp}.csv"
-        filepath = self.output_dir / filename
-        
         if not members:
             logger.warning("No members to export")
-            return str(filepath)
+            return str(self.output_dir / f"{org_name}_members_{timestamp}.csv")
         
         fieldnames = [
             "id", "login", "name", "email", "type", "site_admin",
@@ -118,25 +464,18 @@ class CSVExporter:
         ]
         
         try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-                writer.writeheader()
-                writer.writerows(members)
-            
+            filepath = self._write_csv("members", fieldnames, members, org_name, timestamp)
             logger.info(f"Exported {len(members)} members to {filepath}")
-            return str(filepath)
+            return filepath
         except Exception as e:
             logger.error(f"Failed to export members CSV: {e}")
             raise
     
     def _export_teams(self, teams: List[Dict[str, Any]], org_name: str, timestamp: str) -> str:
         """Export teams to CSV."""
-        filename = f"{org_name}_teams_{timestamp}.csv"
-        filepath = self.output_dir / filename
-        
         if not teams:
             logger.warning("No teams to export")
-            return str(filepath)
+            return str(self.output_dir / f"{org_name}_teams_{timestamp}.csv")
         
         fieldnames = [
             "id", "name", "slug", "description", "privacy", "permission",
@@ -145,60 +484,75 @@ class CSVExporter:
         ]
         
         try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-                writer.writeheader()
-                writer.writerows(teams)
-            
+            filepath = self._write_csv("teams", fieldnames, teams, org_name, timestamp)
             logger.info(f"Exported {len(teams)} teams to {filepath}")
-            return str(filepath)
+            return filepath
         except Exception as e:
             logger.error(f"Failed to export teams CSV: {e}")
             raise
     
     def _export_memberships(self, memberships: List[Dict[str, Any]], org_name: str, timestamp: str) -> str:
         """Export team memberships to CSV."""
-        filename = f"{org_name}_team_memberships_{timestamp}.csv"
-        filepath = self.output_dir / filename
-        
         if not memberships:
             logger.warning("No team memberships to export")
-            return str(filepath)
+            return str(self.output_dir / f"{org_name}_team_memberships_{timestamp}.csv")
         
         fieldnames = [
             "team_id", "team_name", "user_id", "user_login", "user_name", "role"
         ]
         
         try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-                writer.writeheader()
-                writer.writerows(memberships)
-            
+            filepath = self._write_csv("team_memberships", fieldnames, memberships, org_name, timestamp)
             logger.info(f"Exported {len(memberships)} team memberships to {filepath}")
-            return str(filepath)
+            return filepath
         except Exception as e:
             logger.error(f"Failed to export memberships CSV: {e}")
             raise
     
+    def _export_team_repositories(self, grants: List[Dict[str, Any]], org_name: str, timestamp: str) -> str:
+        """Export team repository permissions to CSV."""
+        if not grants:
+            logger.warning("No team repositories to export")
+            return str(self.output_dir / f"{org_name}_team_repositories_{timestamp}.csv")
+        
+        fieldnames = [
+            "team_id", "team_name", "repo_id", "repo", "permission"
+        ]
+        
+        try:
+            filepath = self._write_csv("team_repositories", fieldnames, grants, org_name, timestamp)
+            logger.info(f"Exported {len(grants)} team repositories to {filepath}")
+            return filepath
+        except Exception as e:
+            logger.error(f"Failed to export team repositories CSV: {e}")
+            raise
+    
+    def _export_analytics(self, tables: Dict[str, List[Dict[str, Any]]], org_name: str, timestamp: str) -> List[str]:
+        """Export each non-empty analytics table to its own CSV."""
+        filepaths = []
+        for table, rows in tables.items():
+            if not rows:
+                continue
+            try:
+                filepath = self._write_csv(f"analytics_{table}", list(rows[0]), rows, org_name, timestamp)
+                logger.info(f"Exported {len(rows)} {table} rows to {filepath}")
+                filepaths.append(filepath)
+            except Exception as e:
+                logger.error(f"Failed to export {table} CSV: {e}")
+                raise
+        return filepaths
+    
     def _export_organization(self, org_data: Dict[str, Any], org_name: str, timestamp: str) -> str:
         """Export organization info to CSV."""
-        filename = f"{org_name}_organization_{timestamp}.csv"
-        filepath = self.output_dir / filename
-        
         fieldnames = [
             "id", "login", "name", "description", "email", "location",
             "created_at", "updated_at"
         ]
         
         try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-                writer.writeheader()
-                writer.writerow(org_data)
-            
+            filepath = self._write_csv("organization", fieldnames, [org_data], org_name, timestamp)
             logger.info(f"Exported organization info to {filepath}")
-            return str(filepath)
+            return filepath
         except Exception as e:
             logger.error(f"Failed to export organization CSV: {e}")
             raise
@@ -214,10 +568,32 @@ class Exporter:
         Args:
             output_dir: Directory to save export files
         """
+        self.output_dir = Path(output_dir)
         self.json_exporter = JSONExporter(output_dir)
         self.csv_exporter = CSVExporter(output_dir)
     
-    def export(self, data: Dict[str, Any], org_name: str, export_format: str = "json") -> Any:
+    @property
+    def unchanged_files(self) -> List[str]:
+        """Files from the last exports that were kept because content was unchanged."""
+        return self.json_exporter.unchanged_files + self.csv_exporter.unchanged_files
+    
+    def manifest(self, org_name: str) -> OutputManifest:
+        """
+        Open the manifest for a run that exports several formats.
+        
+        Pass it to each ``export`` call, then save it with
+        ``save_manifest`` so it lists the files of all formats of the run.
+        
+        Args:
+            org_name: Organization name
+            
+        Returns:
+            OutputManifest
+        """
+        return OutputManifest(self.output_dir, org_name)
+    
+    def export(self, data: Dict[str, Any], org_name: str, export_format: str = "json",
+               manifest: Optional[OutputManifest] = None) -> Any:
         """
         Export data in specified format.
         
@@ -225,13 +601,14 @@ class Exporter:
             data: Data dictionary to export
             org_name: Organization name
             export_format: Export format ('json' or 'csv')
+            manifest: Manifest shared by the formats of one run (see ``manifest``)
             
         Returns:
             Path(s) to exported file(s)
         """
         if export_format.lower() == "json":
-            return self.json_exporter.export(data, org_name)
+            return self.json_exporter.export(data, org_name, manifest)
         elif export_format.lower() == "csv":
-            return self.csv_exporter.export(data, org_name)
+            return self.csv_exporter.export(data, org_name, manifest)
         else:
             raise ValueError(f"Unsupported export format: {export_format}")
@@ -3,13 +3,22 @@ GitHub API client for exporting organization data.
 """
 
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime
-from github import Github, GithubException, RateLimitExceededException
+from typing import List, Dict, Any, Callable, Iterator, Optional, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from github import Github, GithubException
 from github.Organization import Organization
 from github.Team import Team
 from github.NamedUser import NamedUser
-import time
+from github.Repository import Repository
+import math
+
+from records import OrgStore, PERMISSIONS
+from retry import FETCH_ERRORS, RetryPolicy
+from estimator import FetchStrategy
+from sharding import ShardSpec
+from team_repos import RepoGrant, TeamRepoCache
+from profiling import PhaseProfiler, profile_phase
 
 logger = logging.getLogger(__name__)
 
@@ -17,22 +26,43 @@ logger = logging.getLogger(__name__)
 class GitHubClient:
     """Client for interacting with GitHub API."""
     
-    def __init__(self, token: str, base_url: str = "https://api.github.com"):
+    def __init__(self, token: str, base_url: str = "https://api.github.com",
+                 retry_policy: Optional[RetryPolicy] = None,
+                 strategy: Optional[FetchStrategy] = None,
+                 shard: Optional[ShardSpec] = None,
+                 profiler: Optional[PhaseProfiler] = None):
         """
         Initialize GitHub client.
         
         Args:
             token: GitHub personal access token
             base_url: GitHub API base URL (for GitHub Enterprise)
+            retry_policy: Retry policy for API requests (default policy if omitted)
+            strategy: Fetch strategy (default strategy if omitted)
+            shard: Slice of the organization to export (everything if omitted)
+            profiler: Profiler for the export phases (no profiling if omitted)
         """
         self.token = token
         self.base_url = base_url
+        self.retry = retry_policy if retry_policy is not None else RetryPolicy()
+        self.strategy = strategy if strategy is not None else FetchStrategy()
+        self.shard = shard
+        self.profiler = profiler
+        
+        # Fetch failures that left the export incomplete
+        self.errors: List[str] = []
+        
+        # Teams of a subtree export (all teams if None)
+        self.team_scope: Optional[List[Team]] = None
         
-        # Initialize PyGithub client
+        # Initialize PyGithub client. Its built-in retries are disabled so
+        # that RetryPolicy is the only retry layer: otherwise every attempt
+        # could itself be retried (and sleep) inside urllib3, outside the
+        # retry budget
         if base_url == "https://api.github.com":
-            self.github = Github(token)
+            self.github = Github(token, per_page=self.strategy.per_page, retry=None)
         else:
-            self.github = Github(base_url=base_url, login_or_token=token)
+            self.github = Github(base_url=base_url, login_or_token=token, per_page=self.strategy.per_page, retry=None)
         
         logger.info(f"Initialized GitHub client with base URL: {base_url}")
     
@@ -67,16 +97,114 @@ class GitHubClient:
             }
         }
     
+    def set_strategy(self, strategy: FetchStrategy):
+        """
+        Switch to a different fetch strategy.
+        
+        Args:
+            strategy: Fetch strategy to use for subsequent requests
+        """
+        self.strategy = strategy
+        self.github.per_page = strategy.per_page
+        logger.info(f"Using fetch strategy: {strategy.describe()}")
+    
     def _handle_rate_limit(self):
         """Handle rate limiting by waiting if necessary."""
-        rate_limit = self.github.get_rate_limit()
-        if rate_limit.core.remaining < 10:
-            reset_time = rate_limit.core.reset
+        # Uses the rate limit reported in the last response's headers,
+        # so checking it does not cost a request per item
+        remaining, _limit = self.github.rate_limiting
+        if remaining < 10:
+            reset_time = datetime.fromtimestamp(self.github.rate_limiting_resettime, timezone.utc)
             current_time = datetime.now(reset_time.tzinfo)
             wait_seconds = (reset_time - current_time).total_seconds() + 10
             if wait_seconds > 0:
                 logger.warning(f"Rate limit low. Waiting {wait_seconds:.0f} seconds...")
-                time.sleep(wait_seconds)
+                self.retry.sleep(wait_seconds)
+    
+    def _iter_page_lists(self, paginated, description: str) -> Iterator[List[Any]]:
+        """
+        Iterate a paginated list page by page, retrying each page request.
+        
+        A transient failure on one page is retried on its own, so items
+        from earlier pages are never thrown away.
+        
+        Args:
+            paginated: PyGithub PaginatedList
+            description: What is being fetched (for logging)
+            
+        Yields:
+            List of items on each page
+        """
+        page = 0
+        while True:
+            items = self.retry.call(
+                paginated.get_page, page,
+                description=f"{description} (page {page + 1})"
+            )
+            if not items:
+                return
+            yield items
+            page += 1
+    
+    def _iter_pages(self, paginated, description: str) -> Iterator[Any]:
+        """
+        Iterate the items of a paginated list, retrying each page request.
+        
+        Args:
+            paginated: PyGithub PaginatedList
+            description: What is being fetched (for logging)
+            
+        Yields:
+            Items from each page
+        """
+        for items in self._iter_page_lists(paginated, description):
+            yield from items
+    
+    def _iter_team_pages(self, org: Organization) -> Iterator[List[Team]]:
+        """
+        Iterate the teams to fetch team data for, page by page.
+        
+        Yields the teams of a subtree export if one is set, otherwise all
+        teams of the organization owned by this client's shard.
+        
+        Args:
+            org: Organization
+            
+        Yields:
+            List of teams on each page
+        """
+        if self.team_scope is not None:
+            for start in range(0, len(self.team_scope), self.strategy.per_page):
+                yield self.team_scope[start:start + self.strategy.per_page]
+            return
+        for page in self._iter_page_lists(org.get_teams(), "teams"):
+            if self.shard is not None:
+                page = [team for team in page if self.shard.owns_team(team.id)]
+            yield page
+    
+    def _map(self, func: Callable[[Any], Any], items: List[Any]) -> Iterator[Any]:
+        """
+        Apply a request-making function to items, in parallel if the
+        strategy allows. Results are returned in item order.
+        
+        Args:
+            func: Function making one API request per item
+            items: Items to process
+            
+        Returns:
+            Iterator over results
+        """
+        if self.strategy.concurrency <= 1 or len(items) <= 1:
+            return map(func, items)
+        if self.profiler is not None:
+            func = self.profiler.wrap(func)
+        with ThreadPoolExecutor(max_workers=self.strategy.concurrency) as executor:
+            return iter(list(executor.map(func, items)))
+    
+    def _record_error(self, message: str):
+        """Record a fetch failure that leaves the export incomplete."""
+        logger.error(message)
+        self.errors.append(message)
     
     def get_organization(self, org_name: str) -> Optional[Organization]:
         """
@@ -89,227 +217,555 @@ class GitHubClient:
             Organization object or None if not found
         """
         try:
-            org = self.github.get_organization(org_name)
+            org = self.retry.call(
+                self.github.get_organization, org_name,
+                description=f"organization {org_name}"
+            )
             logger.info(f"Retrieved organization: {org_name}")
             return org
-        except GithubException as e:
+        except FETCH_ERRORS as e:
             logger.error(f"Failed to get organization {org_name}: {e}")
             return None
     
-    def get_organization_members(self, org_name: str) -> List[Dict[str, Any]]:
+    def get_organization_members(self, org_name: str, store: Optional[OrgStore] = None) -> Sequence[Dict[str, Any]]:
         """
         Get all members of an organization.
         
         Args:
             org_name: Organization name
+            store: Record store to add members to (a new one is created if omitted)
             
         Returns:
-            List of member dictionaries
+            Sequence of member dictionaries
         """
+        store = store if store is not None else OrgStore()
         org = self.get_organization(org_name)
         if not org:
             return []
         
-        members = []
+        members = store.members
         try:
-            for member in org.get_members():
+            for page in self._iter_page_lists(org.get_members(), "members"):
                 self._handle_rate_limit()
-                member_data = {
-                    "id": member.id,
-                    "login": member.login,
-                    "name": member.name,
-                    "email": member.email,
-                    "type": member.type,
-                    "site_admin": member.site_admin,
-                    "company": member.company,
-                    "location": member.location,
-                    "bio": member.bio,
-                    "created_at": member.created_at.isoformat() if member.created_at else None,
-                    "updated_at": member.updated_at.isoformat() if member.updated_at else None
-                }
-                members.append(member_data)
-                logger.debug(f"Retrieved member: {member.login}")
+                if self.shard is not None:
+                    # Every shard lists all members but only fetches the
+                    # profiles of the members it owns
+                    page = [member for member in page if self.shard.owns_member(member.id)]
+                for member_data in self._map(self._fetch_member, page):
+                    store.add_member(member_data)
+                    logger.debug(f"Retrieved member: {member_data['login']}")
             
             logger.info(f"Retrieved {len(members)} members from {org_name}")
-            return members
-        except GithubException as e:
-            logger.error(f"Failed to get members: {e}")
-            return []
+        except FETCH_ERRORS as e:
+            self._record_error(f"Failed to get members after {len(members)} retrieved: {e}")
+        return members
+    
+    def _fetch_member(self, member: NamedUser) -> Dict[str, Any]:
+        """Get a member's exported fields, completing the profile if needed."""
+        if self.strategy.lite_fields:
+            return self._member_data_lite(member)
+        # Profile fields are completed lazily, one request per member
+        return self.retry.call(
+            self._member_data, member,
+            description=f"member {member.login}"
+        )
+    
+    @staticmethod
+    def _member_data_lite(member: NamedUser) -> Dict[str, Any]:
+        """Convert a member to a dictionary using only list response fields."""
+        return {
+            "id": member.id,
+            "login": member.login,
+            "type": member.type,
+            "site_admin": member.site_admin
+        }
+    
+    @staticmethod
+    def _member_data(member: NamedUser) -> Dict[str, Any]:
+        """Convert a member to a dictionary of exported fields."""
+        return {
+            "id": member.id,
+            "login": member.login,
+            "name": member.name,
+            "email": member.email,
+            "type": member.type,
+            "site_admin": member.site_admin,
+            "company": member.company,
+            "location": member.location,
+            "bio": member.bio,
+            "created_at": member.created_at.isoformat() if member.created_at else None,
+            "updated_at": member.updated_at.isoformat() if member.updated_at else None
+        }
     
-    def get_organization_teams(self, org_name: str) -> List[Dict[str, Any]]:
+    def get_organization_teams(self, org_name: str, store: Optional[OrgStore] = None) -> Sequence[Dict[str, Any]]:
         """
         Get all teams in an organization.
         
         Args:
             org_name: Organization name
+            store: Record store to add teams to (a new one is created if omitted)
             
         Returns:
-            List of team dictionaries with hierarchy information
+            Sequence of team dictionaries with hierarchy information
         """
+        store = store if store is not None else OrgStore()
         org = self.get_organization(org_name)
         if not org:
             return []
         
-        teams = []
+        teams = store.teams
         try:
-            for team in org.get_teams():
+            for page in self._iter_page_lists(org.get_teams(), "teams"):
                 self._handle_rate_limit()
-                
-                # Get parent team info if exists
-                parent_id = None
-                parent_name = None
-                try:
-                    parent = team.parent
-                    if parent:
-                        parent_id = parent.id
-                        parent_name = parent.name
-                except (AttributeError, GithubException):
-                    pass
-                
-                team_data = {
-                    "id": team.id,
-                    "name": team.name,
-                    "slug": team.slug,
-                    "description": team.description,
-                    "privacy": team.privacy,
-                    "permission": team.permission,
-                    "parent_id": parent_id,
-                    "parent_name": parent_name,
-                    "members_count": team.members_count,
-                    "repos_count": team.repos_count,
-                    "created_at": team.created_at.isoformat() if team.created_at else None,
-                    "updated_at": team.updated_at.isoformat() if team.updated_at else None
-                }
-                teams.append(team_data)
-                logger.debug(f"Retrieved team: {team.name}")
+                if self.shard is not None:
+                    page = [team for team in page if self.shard.owns_team(team.id)]
+                for team_data in self._map(self._fetch_team, page):
+                    store.add_team(team_data)
+                    logger.debug(f"Retrieved team: {team_data['name']}")
             
             logger.info(f"Retrieved {len(teams)} teams from {org_name}")
-            return teams
-        except GithubException as e:
-            logger.error(f"Failed to get teams: {e}")
-            return []
+        except FETCH_ERRORS as e:
+            self._record_error(f"Failed to get teams after {len(teams)} retrieved: {e}")
+        return teams
+    
+    def _fetch_team(self, team: Team) -> Dict[str, Any]:
+        """Get a team's exported fields, completing the team if needed."""
+        if self.strategy.lite_fields:
+            return self._team_data_lite(team)
+        return self.retry.call(
+            self._team_data, team,
+            description=f"team {team.name}"
+        )
     
-    def get_team_memberships(self, org_name: str) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _team_data_lite(team: Team) -> Dict[str, Any]:
+        """Convert a team to a dictionary using only list response fields."""
+        parent = team.parent
+        return {
+            "id": team.id,
+            "name": team.name,
+            "slug": team.slug,
+            "description": team.description,
+            "privacy": team.privacy,
+            "permission": team.permission,
+            "parent_id": parent.id if parent else None,
+            "parent_name": parent.name if parent else None
+        }
+    
+    @staticmethod
+    def _team_data(team: Team) -> Dict[str, Any]:
+        """Convert a team to a dictionary of exported fields."""
+        # Get parent team info if exists
+        parent_id = None
+        parent_name = None
+        try:
+            parent = team.parent
+            if parent:
+                parent_id = parent.id
+                parent_name = parent.name
+        except (AttributeError, GithubException):
+            pass
+        
+        return {
+            "id": team.id,
+            "name": team.name,
+            "slug": team.slug,
+            "description": team.description,
+            "privacy": team.privacy,
+            "permission": team.permission,
+            "parent_id": parent_id,
+            "parent_name": parent_name,
+            "members_count": team.members_count,
+            "repos_count": team.repos_count,
+            "created_at": team.created_at.isoformat() if team.created_at else None,
+            "updated_at": team.updated_at.isoformat() if team.updated_at else None
+        }
+    
+    def get_team_memberships(self, org_name: str, store: Optional[OrgStore] = None) -> Sequence[Dict[str, Any]]:
         """
         Get all team memberships (which users belong to which teams).
         
+        Users already present in the store are referenced by index, so
+        their profile is not fetched again for every team they belong to.
+        
         Args:
             org_name: Organization name
+            store: Record store to add memberships to (a new one is created if omitted)
             
         Returns:
-            List of membership dictionaries
+            Sequence of membership dictionaries
         """
+        store = store if store is not None else OrgStore()
         org = self.get_organization(org_name)
         if not org:
             return []
         
-        memberships = []
+        memberships = store.memberships
+        fetch = lambda team: self._fetch_team_members(team, store)
         try:
-            for team in org.get_teams():
+            for page in self._iter_team_pages(org):
                 self._handle_rate_limit()
-                team_id = team.id
-                team_name = team.name
-                
-                try:
-                    for member in team.get_members():
-                        self._handle_rate_limit()
-                        membership_data = {
-                            "team_id": team_id,
-                            "team_name": team_name,
-                            "user_id": member.id,
-                            "user_login": member.login,
-                            "user_name": member.name,
-                            "role": "member"  # PyGithub doesn't expose role easily
-                        }
-                        memberships.append(membership_data)
-                        logger.debug(f"Retrieved membership: {member.login} in {team_name}")
-                except GithubException as e:
-                    logger.warning(f"Failed to get members for team {team_name}: {e}")
+                for team, team_members, error in self._map(fetch, page):
+                    if error is not None:
+                        self._record_error(f"Failed to get members for team {team.name}: {error}")
+                    for user_id, user_login, user_name in team_members:
+                        store.add_membership(
+                            team.id,
+                            team.name,
+                            user_id,
+                            user_login=user_login,
+                            user_name=user_name,
+                            role="member"  # PyGithub doesn't expose role easily
+                        )
+                        logger.debug(f"Retrieved membership: {user_login} in {team.name}")
             
             logger.info(f"Retrieved {len(memberships)} team memberships from {org_name}")
-            return memberships
-        except GithubException as e:
-            logger.error(f"Failed to get team memberships: {e}")
-            return []
+        except FETCH_ERRORS as e:
+            self._record_error(f"Failed to get team memberships after {len(memberships)} retrieved: {e}")
+        return memberships
+    
+    def _fetch_team_members(self, team: Team, store: OrgStore) -> Tuple[Team, List[Tuple[int, Optional[str], Optional[str]]], Optional[Exception]]:
+        """
+        Fetch the members of one team.
+        
+        Args:
+            team: Team to fetch members for
+            store: Record store used to skip profile lookups for known users
+            
+        Returns:
+            Tuple of (team, list of (user_id, login, name), error or None)
+        """
+        team_members = []
+        try:
+            for member in self._iter_pages(team.get_members(), f"members of team {team.name}"):
+                if store.has_user(member.id):
+                    team_members.append((member.id, None, None))
+                elif self.strategy.lite_fields or self.shard is not None:
+                    # Sharded runs leave names of members exported by other
+                    # shards to the merge step
+                    team_members.append((member.id, member.login, None))
+                else:
+                    user_name = self.retry.call(getattr, member, "name", description=f"user {member.login}")
+                    team_members.append((member.id, member.login, user_name))
+        except FETCH_ERRORS as e:
+            return team, team_members, e
+        return team, team_members, None
     
-    def get_full_export_data(self, org_name: str) -> Dict[str, Any]:
+    def get_team_subtree(self, org_name: str, team_slug: str, store: Optional[OrgStore] = None,
+                         include_descendants: bool = False) -> Optional[Sequence[Dict[str, Any]]]:
         """
-        Get complete export data for an organization.
+        Get one team (and optionally its descendants) with their members.
+        
+        The subtree is walked level by level through the child teams
+        endpoint, so no other team of the organization is listed. Member
+        profiles are fetched only for users who belong to these teams, and
+        later team-level requests (such as team repositories) are limited
+        to the subtree.
         
         Args:
             org_name: Organization name
+            team_slug: Slug of the subtree's root team
+            store: Record store to add teams, members and memberships to
+                (a new one is created if omitted)
+            include_descendants: Also export all teams below the root team
             
         Returns:
-            Dictionary with all organization data
+            Sequence of team dictionaries, or None if the team was not found
         """
-        logger.info(f"Starting full export for organization: {org_name}")
+        store = store if store is not None else OrgStore()
+        org = self.get_organization(org_name)
+        if not org:
+            return None
+        
+        try:
+            root = self.retry.call(org.get_team_by_slug, team_slug, description=f"team {team_slug}")
+        except FETCH_ERRORS as e:
+            logger.error(f"Failed to get team {team_slug}: {e}")
+            return None
+        
+        scope = [root]
+        level = [root]
+        while include_descendants and level:
+            self._handle_rate_limit()
+            next_level = []
+            for team, children, error in self._map(self._fetch_child_teams, level):
+                if error is not None:
+                    self._record_error(f"Failed to get child teams of {team.name}: {error}")
+                next_level.extend(children)
+            scope.extend(next_level)
+            level = next_level
+        self.team_scope = scope
+        logger.info(f"Exporting {len(scope)} teams under {team_slug}")
         
+        teams = store.teams
+        members = store.members
+        try:
+            for team_data in self._map(self._fetch_team, scope):
+                store.add_team(team_data)
+            
+            # Members of all teams first, so each profile is fetched once
+            team_members: Dict[int, List[int]] = {}
+            users: Dict[int, NamedUser] = {}
+            for team, team_users, error in self._map(self._fetch_team_member_list, scope):
+                if error is not None:
+                    self._record_error(f"Failed to get members for team {team.name}: {error}")
+                team_members[team.id] = [user.id for user in team_users]
+                for user in team_users:
+                    users.setdefault(user.id, user)
+            
+            for member_data in self._map(self._fetch_member, list(users.values())):
+                store.add_member(member_data)
+            
+            for team in scope:
+                for user_id in team_members.get(team.id, []):
+                    store.add_membership(team.id, team.name, user_id, role="member")
+            
+            logger.info(f"Retrieved {len(teams)} teams and {len(members)} members under {team_slug}")
+        except FETCH_ERRORS as e:
+            self._record_error(f"Failed to export team subtree {team_slug}: {e}")
+        return teams
+    
+    def _fetch_child_teams(self, team: Team) -> Tuple[Team, List[Team], Optional[Exception]]:
+        """
+        Fetch the direct child teams of a team.
+        
+        Returns:
+            Tuple of (team, list of child teams, error or None)
+        """
+        children = []
+        try:
+            children.extend(self._iter_pages(team.get_teams(), f"child teams of {team.name}"))
+        except FETCH_ERRORS as e:
+            return team, children, e
+        return team, children, None
+    
+    def _fetch_team_member_list(self, team: Team) -> Tuple[Team, List[NamedUser], Optional[Exception]]:
+        """
+        Fetch the members of a team without completing their profiles.
+        
+        Returns:
+            Tuple of (team, list of users, error or None)
+        """
+        team_users = []
+        try:
+            team_users.extend(self._iter_pages(team.get_members(), f"members of team {team.name}"))
+        except FETCH_ERRORS as e:
+            return team, team_users, e
+        return team, team_users, None
+    
+    def get_team_repositories(self, org_name: str, store: Optional[OrgStore] = None,
+                              cache: Optional[TeamRepoCache] = None) -> Sequence[Dict[str, Any]]:
+        """
+        Get the repositories each team has access to, with the team's permission.
+        
+        Teams whose ``repos_count`` and ``updated_at`` match the cache reuse
+        the grants from the previous run. The remaining teams' repository
+        pages are fetched in parallel: when a team's repository count is
+        known, each of its pages is a separate request, so large teams
+        are split across workers instead of being paged one at a time.
+        
+        Args:
+            org_name: Organization name
+            store: Record store holding the teams (a new one is created if omitted)
+            cache: Grants from the previous run (nothing is reused if omitted)
+            
+        Returns:
+            Sequence of team repository dictionaries
+        """
+        store = store if store is not None else OrgStore()
         org = self.get_organization(org_name)
         if not org:
-            return {}
-        
-        # Get basic org info
-        org_data = {
-            "id": org.id,
-            "login": org.login,
-            "name": org.name,
-            "description": org.description,
-            "email": org.email,
-            "location": org.location,
-            "created_at": org.created_at.isoformat() if org.created_at else None,
-            "updated_at": org.updated_at.isoformat() if org.updated_at else None
-        }
+            return []
+        
+        store.has_team_repositories = True
+        grants = store.team_repositories
+        try:
+            for page in self._iter_team_pages(org):
+                self._handle_rate_limit()
+                
+                # Reuse cached grants, and split the rest into page requests
+                results: Dict[int, List[RepoGrant]] = {}
+                work = []
+                for team in page:
+                    record = self._team_record(store, team)
+                    cached = cache.get(team.id, record.repos_count, record.updated_at) if cache else None
+                    if cached is not None:
+                        results[team.id] = cached
+                    elif record.repos_count is None:
+                        work.append((team, 0, True))
+                    else:
+                        pages = max(1, math.ceil(record.repos_count / self.strategy.per_page))
+                        work.extend((team, number, number == pages - 1) for number in range(pages))
+                
+                failed = set()
+                for team, repos, error in self._map(self._fetch_team_repo_page, work):
+                    if error is not None:
+                        failed.add(team.id)
+                        self._record_error(f"Failed to get repositories for team {team.name}: {error}")
+                    results.setdefault(team.id, []).extend(repos)
+                
+                for team in page:
+                    team_grants = results.get(team.id, [])
+                    for repo_id, repo_name, permission in team_grants:
+                        store.add_team_repository(team.id, team.name, repo_id, repo_name, permission)
+                    if cache is not None and team.id not in failed:
+                        record = self._team_record(store, team)
+                        cache.put(team.id, record.repos_count, record.updated_at, team_grants)
+            
+            logger.info(f"Retrieved {len(grants)} team repository grants from {org_name}")
+        except FETCH_ERRORS as e:
+            self._record_error(f"Failed to get team repositories after {len(grants)} retrieved: {e}")
+        return grants
+    
+    @staticmethod
+    def _team_record(store: OrgStore, team: Team):
+        """Get the stored record of a team, adding a stub if it is not known."""
+        idx = store.team_index.get(team.id)
+        if idx is None:
+            idx = store.add_team({"id": team.id, "name": team.name})
+        return store.team_records[idx]
+    
+    def _fetch_team_repo_page(self, item: Tuple[Team, int, bool]) -> Tuple[Team, List[RepoGrant], Optional[Exception]]:
+        """
+        Fetch one page of a team's repositories.
         
-        # Get all data
-        members = self.get_organization_members(org_name)
-        teams = self.get_organization_teams(org_name)
-        memberships = self.get_team_memberships(org_name)
+        If the page is the team's last expected page, following pages are
+        fetched as well for as long as they are full, which covers teams of
+        unknown size and repositories added since the team was fetched.
         
-        # Build team hierarchy
-        team_hierarchy = self._build_team_hierarchy(teams)
+        Args:
+            item: Tuple of (team, zero-based page, whether it is the last expected page)
+            
+        Returns:
+            Tuple of (team, list of grants, error or None)
+        """
+        team, number, last = item
+        if last:
+            grants, error = self._fetch_team_repos_from(team, number)
+            return team, grants, error
+        try:
+            repos = self.retry.call(
+                team.get_repos().get_page, number,
+                description=f"repositories of team {team.name} (page {number + 1})"
+            )
+        except FETCH_ERRORS as e:
+            return team, [], e
+        return team, [self._repo_grant(repo) for repo in repos], None
+    
+    def _fetch_team_repos_from(self, team: Team, first_page: int) -> Tuple[List[RepoGrant], Optional[Exception]]:
+        """
+        Fetch a team's repositories page by page, starting at a given page.
         
-        return {
-            "organization": org_data,
-            "members": members,
-            "teams": teams,
-            "team_memberships": memberships,
-            "team_hierarchy": team_hierarchy,
-            "statistics": {
-                "total_members": len(members),
-                "total_teams": len(teams),
-                "total_memberships": len(memberships)
-            }
-        }
+        Args:
+            team: Team to fetch repositories for
+            first_page: Zero-based page to start at
+            
+        Returns:
+            Tuple of (list of grants, error or None)
+        """
+        grants = []
+        paginated = team.get_repos()
+        number = first_page
+        try:
+            while True:
+                repos = self.retry.call(
+                    paginated.get_page, number,
+                    description=f"repositories of team {team.name} (page {number + 1})"
+                )
+                grants.extend(self._repo_grant(repo) for repo in repos)
+                if len(repos) < self.strategy.per_page:
+                    return grants, None
+                number += 1
+        except FETCH_ERRORS as e:
+            return grants, e
     
-    def _build_team_hierarchy(self, teams: List[Dict[str, Any]]) -> Dict[str, Any]:
+    @staticmethod
+    def _repo_grant(repo: Repository) -> RepoGrant:
+        """Convert a team repository to (repo_id, full name, team permission)."""
+        # The team repository list reports the team's permissions on each repository
+        permissions = repo.permissions
+        permission = next(
+            (name for name in reversed(PERMISSIONS) if getattr(permissions, name, False)),
+            PERMISSIONS[0]
+        )
+        return repo.id, repo.full_name, permission
+    
+    def get_full_export_data(self, org_name: str, team_repos: bool = False,
+                             team_repo_cache: Optional[TeamRepoCache] = None,
+                             team_slug: Optional[str] = None,
+                             include_descendants: bool = False) -> Dict[str, Any]:
         """
-        Build hierarchical team structure.
+        Get complete export data for an organization, or for one team subtree.
         
         Args:
-            teams: List of team dictionaries
+            org_name: Organization name
+            team_repos: Also export each team's repositories and permissions
+            team_repo_cache: Grants from the previous run, reused for unchanged teams
+            team_slug: Only export this team and its members
+            include_descendants: With team_slug, also export all teams below it
             
         Returns:
-            Nested dictionary representing team hierarchy
+            Dictionary with all organization data
         """
-        # Create lookup dictionaries
-        teams_by_id = {team["id"]: team.copy() for team in teams}
+        logger.info(f"Starting full export for organization: {org_name}")
         
-        # Initialize children lists
-        for team in teams_by_id.values():
-            team["children"] = []
+        with profile_phase(self.profiler, "organization"):
+            org = self.get_organization(org_name)
+            if not org:
+                return {}
+            
+            # Get basic org info
+            org_data = {
+                "id": org.id,
+                "login": org.login,
+                "name": org.name,
+                "description": org.description,
+                "email": org.email,
+                "location": org.location,
+                "created_at": org.created_at.isoformat() if org.created_at else None,
+                "updated_at": org.updated_at.isoformat() if org.updated_at else None
+            }
         
-        # Build hierarchy
-        root_teams = []
-        for team in teams_by_id.values():
-            if team["parent_id"] is None:
-                root_teams.append(team)
-            else:
-                parent = teams_by_id.get(team["parent_id"])
-                if parent:
-                    parent["children"].append(team)
+        # Get all data into one compact store
+        store = OrgStore()
+        if team_slug is not None:
+            with profile_phase(self.profiler, "subtree"):
+                if self.get_team_subtree(org_name, team_slug, store, include_descendants) is None:
+                    return {}
+        else:
+            with profile_phase(self.profiler, "members"):
+                self.get_organization_members(org_name, store)
+            with profile_phase(self.profiler, "teams"):
+                self.get_organization_teams(org_name, store)
+            with profile_phase(self.profiler, "memberships"):
+                self.get_team_memberships(org_name, store)
+        if team_repos:
+            with profile_phase(self.profiler, "team_repos"):
+                self.get_team_repositories(org_name, store, team_repo_cache)
         
+        # Sort records; the team hierarchy is expanded lazily while the
+        # exporters write it, so its cost falls in the export phases
+        with profile_phase(self.profiler, "sort"):
+            data = store.export_data(org_data, self._export_status())
+        if self.shard is not None:
+            data["shard"] = {
+                "index": self.shard.index,
+                "count": self.shard.count
+            }
+        return data
+    
+    def _export_status(self) -> Dict[str, Any]:
+        """
+        Describe whether the export is complete.
+        
+        Returns:
+            Dictionary with completeness flag, fetch errors and retries used
+        """
         return {
-            "root_teams": root_teams
+            "complete": not self.errors,
+            "errors": list(self.errors),
+            "retries": self.retry.retries_used,
+            "strategy": self.strategy.to_dict()
         }
     
     def close(self):
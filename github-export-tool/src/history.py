@@ -0,0 +1,391 @@
+"""
+Append-only history of exports stored as deltas with periodic checkpoints.
+
+Each export added to the history is compared with the previous one and
+only the added, removed and changed members, teams and membership edges
+are written, so storage grows with churn rather than with organization
+size times the number of runs. Every ``checkpoint_interval`` snapshots a
+full checkpoint is written, which bounds the number of deltas replayed to
+reconstruct a point in time.
+
+The index records, for every snapshot, the headcount of each team whose
+headcount changed (all teams at checkpoints), so headcount time series are
+answered from the index alone.
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from diffing import iter_json_section
+from records import OrgStore
+
+logger = logging.getLogger(__name__)
+
+# Full snapshot every this many snapshots
+DEFAULT_CHECKPOINT_INTERVAL = 10
+
+_EXPORT_TIMESTAMP = re.compile(r"_(\d{8}_\d{6})\.json$")
+
+# Membership edge value: (role, user_login, user_name)
+EdgeValue = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+class SnapshotState:
+    """Members, teams and membership edges of one snapshot, keyed by ID."""
+
+    def __init__(self):
+        """Initialize an empty state."""
+        self.organization: Dict[str, Any] = {}
+        self.members: Dict[int, Dict[str, Any]] = {}
+        self.teams: Dict[int, Dict[str, Any]] = {}
+        self.memberships: Dict[Tuple[int, int], EdgeValue] = {}
+
+    @classmethod
+    def from_records(
+        cls,
+        organization: Dict[str, Any],
+        members: Iterable[Dict[str, Any]],
+        teams: Iterable[Dict[str, Any]],
+        memberships: Iterable[Dict[str, Any]]
+    ) -> "SnapshotState":
+        """
+        Build a state from export records.
+
+        Args:
+            organization: Organization info
+            members: Member records
+            teams: Team records
+            memberships: Team membership records
+
+        Returns:
+            SnapshotState
+        """
+        state = cls()
+        state.organization = dict(organization)
+        state.members = {member["id"]: dict(member) for member in members}
+        state.teams = {team["id"]: dict(team) for team in teams}
+        state.memberships = {
+            (m["team_id"], m["user_id"]): (m.get("role"), m.get("user_login"), m.get("user_name"))
+            for m in memberships
+        }
+        return state
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint: Dict[str, Any]) -> "SnapshotState":
+        """Build a state from a stored checkpoint."""
+        state = cls()
+        state.organization = checkpoint["organization"]
+        state.members = {member["id"]: member for member in checkpoint["members"]}
+        state.teams = {team["id"]: team for team in checkpoint["teams"]}
+        state.memberships = {(edge[0], edge[1]): tuple(edge[2:]) for edge in checkpoint["memberships"]}
+        return state
+
+    def to_checkpoint(self) -> Dict[str, Any]:
+        """Convert the state to a checkpoint dictionary."""
+        return {
+            "organization": self.organization,
+            "members": [self.members[key] for key in sorted(self.members)],
+            "teams": [self.teams[key] for key in sorted(self.teams)],
+            "memberships": [[*key, *self.memberships[key]] for key in sorted(self.memberships)]
+        }
+
+    def delta_to(self, other: "SnapshotState") -> Dict[str, Any]:
+        """
+        Compute the changes from this state to another.
+
+        Args:
+            other: Later state
+
+        Returns:
+            Delta dictionary (empty if nothing changed)
+        """
+        delta: Dict[str, Any] = {}
+        if other.organization != self.organization:
+            delta["organization"] = other.organization
+        for entity in ("members", "teams"):
+            old, new = getattr(self, entity), getattr(other, entity)
+            changes = {
+                "upserted": [new[key] for key in sorted(new) if old.get(key) != new[key]],
+                "removed": sorted(key for key in old if key not in new)
+            }
+            if changes["upserted"] or changes["removed"]:
+                delta[entity] = changes
+        old, new = self.memberships, other.memberships
+        changes = {
+            "upserted": [[*key, *new[key]] for key in sorted(new) if old.get(key) != new[key]],
+            "removed": [list(key) for key in sorted(key for key in old if key not in new)]
+        }
+        if changes["upserted"] or changes["removed"]:
+            delta["memberships"] = changes
+        return delta
+
+    def apply(self, delta: Dict[str, Any]):
+        """
+        Apply a delta in place.
+
+        Args:
+            delta: Delta produced by delta_to
+        """
+        if "organization" in delta:
+            self.organization = delta["organization"]
+        for entity in ("members", "teams"):
+            changes = delta.get(entity)
+            if not changes:
+                continue
+            records = getattr(self, entity)
+            for key in changes["removed"]:
+                records.pop(key, None)
+            for record in changes["upserted"]:
+                records[record["id"]] = record
+        changes = delta.get("memberships")
+        if changes:
+            for team_id, user_id in changes["removed"]:
+                self.memberships.pop((team_id, user_id), None)
+            for edge in changes["upserted"]:
+                self.memberships[(edge[0], edge[1])] = tuple(edge[2:])
+
+    def headcounts(self) -> Dict[int, int]:
+        """Number of membership edges of every team."""
+        counts = {team_id: 0 for team_id in self.teams}
+        for team_id, _ in self.memberships:
+            counts[team_id] = counts.get(team_id, 0) + 1
+        return counts
+
+    def to_export(self, export_status: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert the state to export data, with hierarchy and statistics.
+
+        Args:
+            export_status: Completeness information for the export
+
+        Returns:
+            Export data dictionary
+        """
+        store = OrgStore()
+        for key in sorted(self.members):
+            store.add_member(self.members[key])
+        for key in sorted(self.teams):
+            store.add_team(self.teams[key])
+        for (team_id, user_id), (role, login, name) in sorted(self.memberships.items()):
+            team = self.teams.get(team_id, {})
+            store.add_membership(team_id, team.get("name"), user_id, user_login=login, user_name=name, role=role or "member")
+        return store.export_data(self.organization, export_status)
+
+
+def _write_gzip_json(path: Path, data: Any):
+    """Write gzip-compressed JSON atomically."""
+    tmp = path.with_name(f".{path.name}.tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _read_gzip_json(path: Path) -> Any:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class SnapshotStore:
+    """Append-only store of export snapshots for one organization."""
+
+    def __init__(self, directory: str, name: str, checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL):
+        """
+        Open (or create) a snapshot store.
+
+        The store lives in ``{directory}/{name}_history/``: an ``index.json``
+        plus one gzip-compressed checkpoint or delta file per snapshot.
+
+        Args:
+            directory: Parent directory (usually the export directory)
+            name: Store name (organization name)
+            checkpoint_interval: Write a full checkpoint every this many snapshots
+        """
+        self.path = Path(directory) / f"{name}_history"
+        self.index_path = self.path / "index.json"
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        self.snapshots: List[Dict[str, Any]] = []
+        if self.index_path.exists():
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.snapshots = json.load(f)["snapshots"]
+
+    def _save_index(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_name(f".{self.index_path.name}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"snapshots": self.snapshots}, f, indent=2)
+        os.replace(tmp, self.index_path)
+
+    def _position(self, when: Optional[str]) -> int:
+        """Index of the last snapshot taken at or before ``when`` (latest if None)."""
+        if not self.snapshots:
+            raise ValueError(f"No snapshots in {self.path}")
+        if when is None:
+            return len(self.snapshots) - 1
+        if len(when) == 10:
+            # A date means the end of that day
+            when += "T23:59:59"
+        positions = [i for i, snapshot in enumerate(self.snapshots) if snapshot["timestamp"] <= when]
+        if not positions:
+            raise ValueError(f"No snapshot at or before {when} (first is {self.snapshots[0]['timestamp']})")
+        return positions[-1]
+
+    def state_at(self, when: Optional[str] = None) -> SnapshotState:
+        """
+        Reconstruct the state at a point in time.
+
+        Loads the closest checkpoint at or before the snapshot and replays
+        the deltas after it.
+
+        Args:
+            when: ISO timestamp or date (e.g. '2024-03-01'); latest if None
+
+        Returns:
+            SnapshotState of the last snapshot taken at or before ``when``
+        """
+        position = self._position(when)
+        start = max(i for i in range(position + 1) if self.snapshots[i]["kind"] == "checkpoint")
+        state = SnapshotState.from_checkpoint(_read_gzip_json(self.path / self.snapshots[start]["file"]))
+        for snapshot in self.snapshots[start + 1:position + 1]:
+            if snapshot["file"]:
+                state.apply(_read_gzip_json(self.path / snapshot["file"]))
+        return state
+
+    def append(self, state: SnapshotState, timestamp: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Add a snapshot.
+
+        Args:
+            state: State of the new snapshot
+            timestamp: ISO timestamp of the export (now if None); must not
+                be earlier than the latest snapshot
+
+        Returns:
+            Index entry of the new snapshot
+
+        Raises:
+            ValueError: If the timestamp is earlier than the latest snapshot
+        """
+        timestamp = timestamp or datetime.now().isoformat(timespec="seconds")
+        if self.snapshots and timestamp < self.snapshots[-1]["timestamp"]:
+            raise ValueError(
+                f"Snapshot at {timestamp} is older than the latest snapshot ({self.snapshots[-1]['timestamp']})"
+            )
+
+        seq = len(self.snapshots) + 1
+        last_checkpoint = max(
+            (i for i, snapshot in enumerate(self.snapshots) if snapshot["kind"] == "checkpoint"),
+            default=None
+        )
+        headcounts = state.headcounts()
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        if last_checkpoint is None or len(self.snapshots) - last_checkpoint >= self.checkpoint_interval:
+            filename = f"{seq:06d}_checkpoint.json.gz"
+            _write_gzip_json(self.path / filename, state.to_checkpoint())
+            entry = {
+                "seq": seq,
+                "timestamp": timestamp,
+                "kind": "checkpoint",
+                "file": filename,
+                "headcounts": {str(team_id): count for team_id, count in sorted(headcounts.items())},
+                "team_slugs": {str(team_id): team.get("slug") for team_id, team in sorted(state.teams.items())}
+            }
+        else:
+            previous = self.state_at()
+            delta = previous.delta_to(state)
+            filename = None
+            if delta:
+                filename = f"{seq:06d}_delta.json.gz"
+                _write_gzip_json(self.path / filename, delta)
+            old_counts = previous.headcounts()
+            changed = {
+                str(team_id): count for team_id, count in sorted(headcounts.items())
+                if old_counts.get(team_id) != count
+            }
+            # Removed teams are recorded with a null headcount
+            changed.update({str(team_id): None for team_id in sorted(old_counts) if team_id not in headcounts})
+            entry = {
+                "seq": seq,
+                "timestamp": timestamp,
+                "kind": "delta",
+                "file": filename,
+                "headcounts": changed,
+                "team_slugs": {
+                    str(team["id"]): team.get("slug")
+                    for team in delta.get("teams", {}).get("upserted", [])
+                }
+            }
+
+        self.snapshots.append(entry)
+        self._save_index()
+        logger.info(f"Added {entry['kind']} snapshot {seq} ({timestamp}) to {self.path}")
+        return entry
+
+    def resolve_team(self, team: str) -> Optional[int]:
+        """
+        Find a team ID by ID or by any slug the team has had.
+
+        Args:
+            team: Team ID or slug
+
+        Returns:
+            Team ID, or None if no snapshot contains the team
+        """
+        if team.isdigit():
+            return int(team)
+        for snapshot in reversed(self.snapshots):
+            for team_id, slug in snapshot["team_slugs"].items():
+                if slug == team:
+                    return int(team_id)
+        return None
+
+    def headcount_series(self, team_id: int) -> List[Tuple[str, Optional[int]]]:
+        """
+        Headcount of a team at every snapshot, from the index alone.
+
+        Args:
+            team_id: Team ID
+
+        Returns:
+            List of (timestamp, headcount or None if the team did not exist)
+        """
+        key = str(team_id)
+        series = []
+        count: Optional[int] = None
+        for snapshot in self.snapshots:
+            if snapshot["kind"] == "checkpoint":
+                count = snapshot["headcounts"].get(key)
+            elif key in snapshot["headcounts"]:
+                count = snapshot["headcounts"][key]
+            series.append((snapshot["timestamp"], count))
+        return series
+
+
+def state_from_export_file(path: str) -> Tuple[SnapshotState, Dict[str, Any], Optional[str]]:
+    """
+    Read a JSON export file into a snapshot state, section by section.
+
+    Args:
+        path: Path to a JSON export
+
+    Returns:
+        Tuple of (state, export status, timestamp from the file name or None)
+    """
+    state = SnapshotState.from_records(
+        next(iter_json_section(path, "organization"), {}),
+        iter_json_section(path, "members"),
+        iter_json_section(path, "teams"),
+        iter_json_section(path, "team_memberships")
+    )
+    status = next(iter_json_section(path, "export_status"), {})
+    timestamp = None
+    match = _EXPORT_TIMESTAMP.search(Path(path).name)
+    if match:
+        timestamp = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").isoformat()
+    return state, status, timestamp
@@ -0,0 +1,249 @@
+"""
+Phase-level profiling of an export run.
+
+With ``--profile`` each phase of the run (token validation, members,
+teams, memberships, sort, each output format, ...) runs under
+cProfile and tracemalloc, and its wall time is broken down into time
+spent sleeping (rate-limit waits and retry backoff), on HTTP requests and
+on CPU. Each phase is written to a profile directory as a ``.prof`` file
+(for ``pstats`` or snakeviz) and a text report of its top functions,
+together with a ``summary.json`` of all phases.
+"""
+
+import contextlib
+import cProfile
+import functools
+import json
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Functions listed in each phase's text report
+TOP_FUNCTIONS = 30
+
+
+def profile_phase(profiler: Optional["PhaseProfiler"], name: str) -> ContextManager[None]:
+    """
+    Profile a phase, or do nothing if profiling is off.
+
+    Args:
+        profiler: Active profiler or None
+        name: Phase name
+
+    Returns:
+        Context manager around the phase
+    """
+    return profiler.phase(name) if profiler is not None else contextlib.nullcontext()
+
+
+class PhaseProfiler:
+    """Collect CPU, memory and wait-time profiles per phase of a run."""
+
+    def __init__(self, output_dir: str, name: str):
+        """
+        Initialize profiler.
+
+        Args:
+            output_dir: Directory in which the profile directory is created
+            name: Export name (used in the profile directory name)
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.directory = Path(output_dir) / f"{name}_profile_{timestamp}"
+        self.phases: List[Dict[str, Any]] = []
+        self._current: Optional[Dict[str, Any]] = None
+        self._worker_profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._original_send = None
+
+    def start(self):
+        """Start tracing memory and timing HTTP requests."""
+        tracemalloc.start()
+        self._original_send = requests.Session.send
+        requests.Session.send = self._timed_send(self._original_send)
+
+    def stop(self):
+        """Stop tracing and restore the HTTP session."""
+        if self._original_send is not None:
+            requests.Session.send = self._original_send
+            self._original_send = None
+        tracemalloc.stop()
+
+    def _timed_send(self, send: Callable) -> Callable:
+        """Wrap ``requests.Session.send`` to count request time in the current phase."""
+        local = self._local
+
+        @functools.wraps(send)
+        def timed_send(session, request, **kwargs):
+            # Redirects are sent from inside send; time only the outermost call
+            if getattr(local, "in_send", False):
+                return send(session, request, **kwargs)
+            local.in_send = True
+            start = time.perf_counter()
+            try:
+                return send(session, request, **kwargs)
+            finally:
+                local.in_send = False
+                self._add(network_seconds=time.perf_counter() - start, requests=1)
+
+        return timed_send
+
+    def sleep(self, seconds: float):
+        """
+        Sleep, counting the time in the current phase.
+
+        Used as the retry policy's sleep function, which the client also
+        uses for rate-limit waits.
+
+        Args:
+            seconds: Time to sleep
+        """
+        start = time.perf_counter()
+        time.sleep(seconds)
+        self._add(sleep_seconds=time.perf_counter() - start)
+
+    def _add(self, **amounts: float):
+        with self._lock:
+            if self._current is not None:
+                for key, amount in amounts.items():
+                    self._current[key] += amount
+
+    def wrap(self, func: Callable) -> Callable:
+        """
+        Profile a function that runs on worker threads.
+
+        cProfile only sees the thread it was enabled on, so each worker
+        thread gets its own profile, merged into the phase's stats when
+        the phase ends. On Python 3.12+ the phase's profiler already
+        covers all threads and the function is run as is.
+
+        Args:
+            func: Function passed to a thread pool
+
+        Returns:
+            Wrapped function
+        """
+        local = self._local
+
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            phase = self._current
+            if getattr(local, "phase", None) is not phase:
+                local.phase = phase
+                local.profile = cProfile.Profile()
+                with self._lock:
+                    self._worker_profiles.append(local.profile)
+            try:
+                local.profile.enable()
+            except ValueError:
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                local.profile.disable()
+
+        return profiled
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Profile one phase.
+
+        A phase started inside another one is counted as part of the
+        outer phase.
+
+        Args:
+            name: Phase name
+        """
+        if self._current is not None:
+            yield
+            return
+
+        stats = {
+            "phase": name,
+            "wall_seconds": 0.0,
+            "cpu_seconds": 0.0,
+            "network_seconds": 0.0,
+            "sleep_seconds": 0.0,
+            "requests": 0,
+            "peak_memory_bytes": 0
+        }
+        with self._lock:
+            self._current = stats
+            self._worker_profiles = []
+        tracemalloc.reset_peak()
+        profile = cProfile.Profile()
+        wall, cpu = time.perf_counter(), time.process_time()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            stats["wall_seconds"] = time.perf_counter() - wall
+            stats["cpu_seconds"] = time.process_time() - cpu
+            stats["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+            with self._lock:
+                self._current = None
+                worker_profiles = self._worker_profiles
+            self.phases.append(stats)
+            self._save_phase(len(self.phases), stats, [profile] + worker_profiles)
+
+    def _save_phase(self, number: int, stats: Dict[str, Any], profiles: List[cProfile.Profile]):
+        """Write a phase's merged cProfile stats and its top functions."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        base = self.directory / f"{number:02d}_{stats['phase']}"
+        profiles = [profile for profile in profiles if profile.getstats()]
+        with open(f"{base}.txt", "w", encoding="utf-8") as f:
+            f.write(
+                f"Phase {stats['phase']}: {stats['wall_seconds']:.3f}s wall, "
+                f"{stats['cpu_seconds']:.3f}s CPU, {stats['network_seconds']:.3f}s network "
+                f"({stats['requests']} requests), {stats['sleep_seconds']:.3f}s sleeping, "
+                f"peak memory {stats['peak_memory_bytes'] / 1e6:.1f} MB\n\n"
+            )
+            if not profiles:
+                return
+            merged = pstats.Stats(*profiles, stream=f)
+            merged.dump_stats(f"{base}.prof")
+            merged.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+
+    def finish(self) -> Optional[Path]:
+        """
+        Stop profiling and write ``summary.json``.
+
+        Returns:
+            Profile directory, or None if no phase was profiled
+        """
+        self.stop()
+        if not self.phases:
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / "summary.json", "w", encoding="utf-8") as f:
+            json.dump({"phases": self.phases}, f, indent=2)
+        logger.info(f"Profile written to {self.directory}")
+        return self.directory
+
+    def print_summary(self):
+        """Print a table of the profiled phases."""
+        if not self.phases:
+            return
+        print("\n" + "=" * 76)
+        print("Profile Summary (network and sleep time add up across parallel workers)")
+        print("=" * 76)
+        print(f"{'Phase':<16} {'Wall s':>9} {'CPU s':>9} {'Network s':>10} {'Sleep s':>9} {'Requests':>9} {'Peak MB':>9}")
+        for stats in self.phases:
+            print(
+                f"{stats['phase']:<16} {stats['wall_seconds']:>9.2f} {stats['cpu_seconds']:>9.2f} "
+                f"{stats['network_seconds']:>10.2f} {stats['sleep_seconds']:>9.2f} "
+                f"{stats['requests']:>9} {stats['peak_memory_bytes'] / 1e6:>9.1f}"
+            )
+        print("=" * 76)
+        print(f"Profiles: {self.directory}")
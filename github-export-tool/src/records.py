@@ -0,0 +1,454 @@
+"""
+Compact in-memory record model for organization export data.
+
+Members and teams are stored once as ``__slots__`` records with interned
+strings, and team memberships are stored as integer edges in parallel
+arrays. Records are expanded to plain dictionaries only when they are
+serialized by the exporters.
+"""
+
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+MEMBER_FIELDS = (
+    "id", "login", "name", "email", "type", "site_admin",
+    "company", "location", "bio", "created_at", "updated_at"
+)
+
+TEAM_FIELDS = (
+    "id", "name", "slug", "description", "privacy", "permission",
+    "parent_id", "parent_name", "members_count", "repos_count",
+    "created_at", "updated_at"
+)
+
+MEMBERSHIP_FIELDS = (
+    "team_id", "team_name", "user_id", "user_login", "user_name", "role"
+)
+
+TEAM_REPOSITORY_FIELDS = (
+    "team_id", "team_name", "repo_id", "repo", "permission"
+)
+
+# Membership roles are stored as small integer codes
+ROLES = ("member", "maintainer")
+_ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+# Team repository permissions, lowest to highest, stored the same way
+PERMISSIONS = ("pull", "triage", "push", "maintain", "admin")
+_PERMISSION_CODES = {permission: code for code, permission in enumerate(PERMISSIONS)}
+
+
+def intern_string(value: Optional[str]) -> Optional[str]:
+    """
+    Intern a string so repeated values share one object.
+
+    Args:
+        value: String to intern (None is passed through)
+
+    Returns:
+        Interned string or None
+    """
+    if value is None:
+        return None
+    return sys.intern(value)
+
+
+class MemberRecord:
+    """A single organization member (or a user referenced by a team)."""
+
+    __slots__ = MEMBER_FIELDS
+
+    def __init__(self, **fields: Any):
+        for field in MEMBER_FIELDS:
+            setattr(self, field, fields.get(field))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Expand the record to a dictionary."""
+        return {field: getattr(self, field) for field in MEMBER_FIELDS}
+
+
+class TeamRecord:
+    """A single organization team."""
+
+    __slots__ = TEAM_FIELDS
+
+    def __init__(self, **fields: Any):
+        for field in TEAM_FIELDS:
+            setattr(self, field, fields.get(field))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Expand the record to a dictionary."""
+        return {field: getattr(self, field) for field in TEAM_FIELDS}
+
+
+class RecordView(Sequence):
+    """Read-only sequence that expands records to dictionaries on access."""
+
+    def __init__(self, length: Callable[[], int], expand: Callable[[int], Dict[str, Any]]):
+        self._length = length
+        self._expand = expand
+
+    def __len__(self) -> int:
+        return self._length()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._expand(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+        return self._expand(index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)):
+            yield self._expand(index)
+
+
+class TeamHierarchy:
+    """Parent/child team structure stored as index lists."""
+
+    def __init__(self, store: "OrgStore"):
+        """
+        Build hierarchy from the teams in a store.
+
+        Args:
+            store: Store holding the teams
+        """
+        self._store = store
+        self.root_indices: List[int] = []
+        self.children: Dict[int, List[int]] = {}
+
+        for idx, team in enumerate(store.team_records):
+            parent_idx = None if team.parent_id is None else store.team_index.get(team.parent_id)
+            if parent_idx is None:
+                # Teams whose parent was not exported (such as the root of
+                # a subtree export) are roots of the exported hierarchy
+                self.root_indices.append(idx)
+            else:
+                self.children.setdefault(parent_idx, []).append(idx)
+
+    def _expand(self, idx: int) -> Dict[str, Any]:
+        # Explicit stack: hierarchies can be deeper than the recursion limit
+        root = self._store.team_records[idx].to_dict()
+        stack = [(idx, root)]
+        while stack:
+            parent_idx, node = stack.pop()
+            node["children"] = []
+            for child in self.children.get(parent_idx, []):
+                child_node = self._store.team_records[child].to_dict()
+                node["children"].append(child_node)
+                stack.append((child, child_node))
+        return root
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Expand the hierarchy to nested dictionaries."""
+        return {
+            "root_teams": [self._expand(idx) for idx in self.root_indices]
+        }
+
+
+class OrgStore:
+    """Compact container for members, teams and team membership edges."""
+
+    def __init__(self):
+        """Initialize an empty store."""
+        self.user_records: List[MemberRecord] = []
+        self.user_index: Dict[int, int] = {}
+        self.member_indices = array("l")
+        self.is_member = bytearray()
+
+        self.team_records: List[TeamRecord] = []
+        self.team_index: Dict[int, int] = {}
+
+        self.edge_team = array("l")
+        self.edge_user = array("l")
+        self.edge_role = array("b")
+
+        # Team repository grants: repositories are stored once and
+        # referenced from (team, repo, permission) edges
+        self.repo_ids = array("l")
+        self.repo_names: List[str] = []
+        self.repo_index: Dict[int, int] = {}
+        self.repo_edge_team = array("l")
+        self.repo_edge_repo = array("l")
+        self.repo_edge_permission = array("b")
+        self.has_team_repositories = False
+
+    def _add_user(self, record: MemberRecord) -> int:
+        idx = self.user_index.get(record.id)
+        if idx is None:
+            idx = len(self.user_records)
+            self.user_records.append(record)
+            self.user_index[record.id] = idx
+            self.is_member.append(0)
+        return idx
+
+    def add_member(self, member: Dict[str, Any]) -> int:
+        """
+        Add an organization member.
+
+        Args:
+            member: Member fields (see MEMBER_FIELDS)
+
+        Returns:
+            Index of the member's user record
+        """
+        record = MemberRecord(**member)
+        for field in ("login", "name", "type", "company", "location"):
+            setattr(record, field, intern_string(getattr(record, field)))
+
+        idx = self.user_index.get(record.id)
+        if idx is None:
+            idx = self._add_user(record)
+        else:
+            # Replace a stub created by an earlier membership edge
+            # (or an earlier copy of the same member)
+            self.user_records[idx] = record
+        if not self.is_member[idx]:
+            self.is_member[idx] = 1
+            self.member_indices.append(idx)
+        return idx
+
+    def add_team(self, team: Dict[str, Any]) -> int:
+        """
+        Add a team.
+
+        Args:
+            team: Team fields (see TEAM_FIELDS)
+
+        Returns:
+            Index of the team record
+        """
+        record = TeamRecord(**team)
+        for field in ("name", "slug", "privacy", "permission", "parent_name"):
+            setattr(record, field, intern_string(getattr(record, field)))
+
+        idx = self.team_index.get(record.id)
+        if idx is None:
+            idx = len(self.team_records)
+            self.team_records.append(record)
+            self.team_index[record.id] = idx
+        else:
+            self.team_records[idx] = record
+        return idx
+
+    def has_user(self, user_id: int) -> bool:
+        """Return True if a user record exists for the given id."""
+        return user_id in self.user_index
+
+    def add_membership(
+        self,
+        team_id: int,
+        team_name: Optional[str],
+        user_id: int,
+        user_login: Optional[str] = None,
+        user_name: Optional[str] = None,
+        role: str = "member"
+    ) -> None:
+        """
+        Add a team membership edge.
+
+        Teams and users that are not yet known are added as stub records
+        so the edge can be stored as a pair of integer indices.
+
+        Args:
+            team_id: Team ID
+            team_name: Team name
+            user_id: User ID
+            user_login: User login
+            user_name: User display name
+            role: Membership role
+        """
+        team_idx = self.team_index.get(team_id)
+        if team_idx is None:
+            team_idx = self.add_team({"id": team_id, "name": team_name})
+
+        user_idx = self.user_index.get(user_id)
+        if user_idx is None:
+            user_idx = self._add_user(MemberRecord(
+                id=user_id,
+                login=intern_string(user_login),
+                name=intern_string(user_name)
+            ))
+
+        self.edge_team.append(team_idx)
+        self.edge_user.append(user_idx)
+        self.edge_role.append(_ROLE_CODES.get(role, 0))
+
+    def add_team_repository(
+        self,
+        team_id: int,
+        team_name: Optional[str],
+        repo_id: int,
+        repo_name: str,
+        permission: str
+    ) -> None:
+        """
+        Add a team repository grant edge.
+
+        Args:
+            team_id: Team ID
+            team_name: Team name
+            repo_id: Repository ID
+            repo_name: Repository full name (owner/name)
+            permission: Team's permission on the repository
+        """
+        team_idx = self.team_index.get(team_id)
+        if team_idx is None:
+            team_idx = self.add_team({"id": team_id, "name": team_name})
+
+        repo_idx = self.repo_index.get(repo_id)
+        if repo_idx is None:
+            repo_idx = len(self.repo_names)
+            self.repo_ids.append(repo_id)
+            self.repo_names.append(intern_string(repo_name))
+            self.repo_index[repo_id] = repo_idx
+
+        self.repo_edge_team.append(team_idx)
+        self.repo_edge_repo.append(repo_idx)
+        self.repo_edge_permission.append(_PERMISSION_CODES.get(permission, 0))
+        self.has_team_repositories = True
+
+    def _expand_member(self, i: int) -> Dict[str, Any]:
+        return self.user_records[self.member_indices[i]].to_dict()
+
+    def _expand_team(self, i: int) -> Dict[str, Any]:
+        return self.team_records[i].to_dict()
+
+    def _expand_membership(self, i: int) -> Dict[str, Any]:
+        team = self.team_records[self.edge_team[i]]
+        user = self.user_records[self.edge_user[i]]
+        return {
+            "team_id": team.id,
+            "team_name": team.name,
+            "user_id": user.id,
+            "user_login": user.login,
+            "user_name": user.name,
+            "role": ROLES[self.edge_role[i]]
+        }
+
+    def _expand_team_repository(self, i: int) -> Dict[str, Any]:
+        team = self.team_records[self.repo_edge_team[i]]
+        repo_idx = self.repo_edge_repo[i]
+        return {
+            "team_id": team.id,
+            "team_name": team.name,
+            "repo_id": self.repo_ids[repo_idx],
+            "repo": self.repo_names[repo_idx],
+            "permission": PERMISSIONS[self.repo_edge_permission[i]]
+        }
+
+    @property
+    def members(self) -> RecordView:
+        """Organization members as a sequence of dictionaries."""
+        return RecordView(lambda: len(self.member_indices), self._expand_member)
+
+    @property
+    def teams(self) -> RecordView:
+        """Teams as a sequence of dictionaries."""
+        return RecordView(lambda: len(self.team_records), self._expand_team)
+
+    @property
+    def memberships(self) -> RecordView:
+        """Team memberships as a sequence of dictionaries."""
+        return RecordView(lambda: len(self.edge_team), self._expand_membership)
+
+    @property
+    def team_repositories(self) -> RecordView:
+        """Team repository grants as a sequence of dictionaries."""
+        return RecordView(lambda: len(self.repo_edge_team), self._expand_team_repository)
+
+    def team_hierarchy(self) -> TeamHierarchy:
+        """Build the team hierarchy without copying team records."""
+        return TeamHierarchy(self)
+
+    def sort(self) -> None:
+        """
+        Put records in a canonical order.
+
+        Members and teams are ordered by ID, memberships by (team ID,
+        user ID) and team repositories by (team ID, repository ID), so
+        identical data always serializes to identical output regardless
+        of API ordering.
+        """
+        # Teams: reorder records and remap edge team indices
+        order = sorted(range(len(self.team_records)), key=lambda i: self.team_records[i].id)
+        new_index = array("l", bytes(array("l").itemsize * len(order)))
+        for new, old in enumerate(order):
+            new_index[old] = new
+        self.team_records = [self.team_records[old] for old in order]
+        self.team_index = {team.id: idx for idx, team in enumerate(self.team_records)}
+        self.edge_team = array("l", (new_index[old] for old in self.edge_team))
+        self.repo_edge_team = array("l", (new_index[old] for old in self.repo_edge_team))
+
+        # Members: user records stay in place, only the member list is reordered
+        self.member_indices = array("l", sorted(self.member_indices, key=lambda i: self.user_records[i].id))
+
+        # Memberships: a single integer key per edge keeps sorting cheap
+        user_rank = array("l", bytes(array("l").itemsize * len(self.user_records)))
+        for rank, idx in enumerate(sorted(range(len(self.user_records)), key=lambda i: self.user_records[i].id)):
+            user_rank[idx] = rank
+        users = len(self.user_records)
+        edge_team, edge_user = self.edge_team, self.edge_user
+        order = sorted(range(len(edge_team)), key=lambda i: edge_team[i] * users + user_rank[edge_user[i]])
+        self.edge_team = array("l", (edge_team[i] for i in order))
+        self.edge_user = array("l", (edge_user[i] for i in order))
+        self.edge_role = array("b", (self.edge_role[i] for i in order))
+
+        # Team repositories: keyed by team index, then repository ID
+        repo_ids, edge_team, edge_repo = self.repo_ids, self.repo_edge_team, self.repo_edge_repo
+        order = sorted(range(len(edge_team)), key=lambda i: (edge_team[i], repo_ids[edge_repo[i]]))
+        self.repo_edge_team = array("l", (edge_team[i] for i in order))
+        self.repo_edge_repo = array("l", (edge_repo[i] for i in order))
+        self.repo_edge_permission = array("b", (self.repo_edge_permission[i] for i in order))
+
+    def export_data(self, org_data: Dict[str, Any], export_status: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Assemble the export data dictionary.
+
+        Records are put in canonical order first. Entity lists are record
+        views that expand to dictionaries only when the exporters
+        serialize them. Team repositories are included only if they were
+        fetched.
+
+        Args:
+            org_data: Organization info dictionary
+            export_status: Completeness information for the export
+
+        Returns:
+            Dictionary with all organization data
+        """
+        self.sort()
+        data = {
+            "organization": org_data,
+            "members": self.members,
+            "teams": self.teams,
+            "team_memberships": self.memberships
+        }
+        if self.has_team_repositories:
+            data["team_repositories"] = self.team_repositories
+        data["team_hierarchy"] = self.team_hierarchy()
+        data["statistics"] = self.statistics()
+        data["export_status"] = export_status
+        return data
+
+    def statistics(self) -> Dict[str, int]:
+        """
+        Get summary statistics.
+
+        Returns:
+            Dictionary with member, team, membership and (if fetched)
+            team repository counts
+        """
+        statistics = {
+            "total_members": len(self.member_indices),
+            "total_teams": len(self.team_records),
+            "total_memberships": len(self.edge_team)
+        }
+        if self.has_team_repositories:
+            statistics["total_team_repositories"] = len(self.repo_edge_team)
+        return statistics
@@ -0,0 +1,193 @@
+"""
+Request-level retry with exponential backoff for GitHub API calls.
+"""
+
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from github import GithubException, RateLimitExceededException
+
+try:
+    from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+    NETWORK_ERRORS = (RequestsConnectionError, Timeout, ConnectionError, TimeoutError)
+except ImportError:  # pragma: no cover - requests is a PyGithub dependency
+    NETWORK_ERRORS = (ConnectionError, TimeoutError)
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses that indicate a transient server-side failure
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RetryBudgetExhausted(Exception):
+    """Raised when the per-run retry budget has been used up."""
+
+
+# Failures of a fetch step once retries are exhausted: recorded as export
+# errors so the data fetched so far is still written
+FETCH_ERRORS = (GithubException, RetryBudgetExhausted) + NETWORK_ERRORS
+
+
+def _header(headers: Optional[Dict[str, Any]], name: str) -> Optional[str]:
+    """Look up a response header case-insensitively."""
+    if not headers:
+        return None
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Classify an exception as transient (worth retrying) or permanent.
+
+    Args:
+        error: Exception raised by an API call
+
+    Returns:
+        True if the request should be retried
+    """
+    if isinstance(error, RateLimitExceededException):
+        return True
+    if isinstance(error, GithubException):
+        if error.status in RETRYABLE_STATUSES:
+            return True
+        if error.status == 403:
+            # Secondary rate limits are reported as 403 with Retry-After
+            # or a "rate limit" message
+            headers = getattr(error, "headers", None)
+            message = str(getattr(error, "data", "") or "").lower()
+            return (
+                _header(headers, "retry-after") is not None
+                or _header(headers, "x-ratelimit-remaining") == "0"
+                or "rate limit" in message
+            )
+        return False
+    return isinstance(error, NETWORK_ERRORS)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Get the server-requested wait time for a failed request.
+
+    Honors ``Retry-After`` and, for exhausted primary rate limits,
+    ``X-RateLimit-Reset``.
+
+    Args:
+        error: Exception raised by an API call
+
+    Returns:
+        Seconds to wait, or None if the server did not say
+    """
+    headers = getattr(error, "headers", None)
+    retry_after = _header(headers, "retry-after")
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            return None
+
+    if _header(headers, "x-ratelimit-remaining") == "0":
+        reset = _header(headers, "x-ratelimit-reset")
+        if reset is not None:
+            try:
+                reset_time = float(reset)
+            except ValueError:
+                return None
+            return max(0.0, reset_time - datetime.now(timezone.utc).timestamp())
+    return None
+
+
+class RetryPolicy:
+    """Retry transient API failures with exponential backoff and jitter."""
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        budget: int = 100,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Initialize retry policy.
+
+        Args:
+            max_attempts: Maximum attempts per request (including the first)
+            base_delay: Initial backoff delay in seconds
+            max_delay: Upper bound for computed backoff delays in seconds
+            budget: Maximum number of retries for the whole run
+            sleep: Sleep function (replaceable for profiling)
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.sleep = sleep
+        self.retries_used = 0
+
+    @property
+    def budget_remaining(self) -> int:
+        """Number of retries left in the per-run budget."""
+        return max(0, self.budget - self.retries_used)
+
+    def backoff_delay(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """
+        Compute the delay before the next attempt.
+
+        Args:
+            attempt: Number of the attempt that just failed (1-based)
+            error: Exception raised by that attempt
+
+        Returns:
+            Delay in seconds
+        """
+        server_delay = retry_after_seconds(error) if error is not None else None
+        if server_delay is not None:
+            # Small jitter keeps parallel clients from waking up together
+            return server_delay + random.uniform(0, self.base_delay)
+
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def call(self, func: Callable[..., Any], *args: Any, description: str = "request", **kwargs: Any) -> Any:
+        """
+        Call a function, retrying transient failures.
+
+        Args:
+            func: Function performing one API request
+            *args: Positional arguments for func
+            description: Human-readable request description for logging
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Return value of func
+
+        Raises:
+            The last exception if it is not retryable or attempts ran out,
+            RetryBudgetExhausted if the per-run budget is used up
+        """
+        attempt = 1
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_attempts:
+                    raise
+                if self.budget_remaining <= 0:
+                    raise RetryBudgetExhausted(
+                        f"Retry budget of {self.budget} exhausted while fetching {description}: {e}"
+                    ) from e
+
+                delay = self.backoff_delay(attempt, e)
+                self.retries_used += 1
+                logger.warning(
+                    f"Transient error fetching {description} "
+                    f"(attempt {attempt}/{self.max_attempts}): {e}. Retrying in {delay:.1f}s..."
+                )
+                self.sleep(delay)
+                attempt += 1
@@ -0,0 +1,206 @@
+"""
+Sharded exports across machines and deterministic merging of shard outputs.
+
+Teams and members are assigned to shards by a stable hash of their ID, so
+N independent runs export disjoint slices of an organization, even if the
+runs see members join or leave in between. Exports are written in canonical ID
+order, so merging the shards gives the same records, in the same order, as
+a single-node export.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List
+
+from records import OrgStore
+
+logger = logging.getLogger(__name__)
+
+
+def stable_hash(key: Any) -> int:
+    """
+    Hash a key identically across processes and machines.
+
+    Args:
+        key: Value to hash (converted to a string)
+
+    Returns:
+        Non-negative integer hash
+    """
+    digest = hashlib.sha1(str(key).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+class ShardSpec:
+    """One slice of a sharded export (1-based index out of count)."""
+
+    def __init__(self, index: int, count: int):
+        """
+        Initialize shard specification.
+
+        Args:
+            index: Shard number, from 1 to count
+            count: Total number of shards
+        """
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"Invalid shard {index}/{count}")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, text: str) -> "ShardSpec":
+        """
+        Parse a shard specification of the form ``i/N``.
+
+        Args:
+            text: Shard specification
+
+        Returns:
+            ShardSpec
+
+        Raises:
+            ValueError: If the specification is malformed
+        """
+        try:
+            index, count = (int(part) for part in text.split("/"))
+        except ValueError:
+            raise ValueError(f"Invalid shard '{text}', expected i/N (e.g. 1/4)")
+        return cls(index, count)
+
+    def _owns(self, key: str) -> bool:
+        return stable_hash(key) % self.count == self.index - 1
+
+    def owns_team(self, team_id: int) -> bool:
+        """Return True if this shard exports the given team."""
+        return self._owns(f"team:{team_id}")
+
+    def owns_member(self, user_id: int) -> bool:
+        """Return True if this shard exports the given member."""
+        return self._owns(f"member:{user_id}")
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def load_export(path: str) -> Dict[str, Any]:
+    """
+    Load a JSON export file.
+
+    Args:
+        path: Path to the export file
+
+    Returns:
+        Export data dictionary
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def merge_exports(exports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge shard exports into one export.
+
+    Members, teams and memberships are deduplicated and put in canonical
+    ID order, and the team hierarchy and statistics are rebuilt from the
+    merged records. The result is marked incomplete if any shard is
+    missing or was itself incomplete.
+
+    Args:
+        exports: Shard export data dictionaries
+
+    Returns:
+        Merged export data dictionary
+
+    Raises:
+        ValueError: If the exports belong to different organizations,
+            different shard layouts, or were fetched with different field
+            sets (full and lite records)
+    """
+    if not exports:
+        raise ValueError("No exports to merge")
+
+    org_ids = {export["organization"]["id"] for export in exports}
+    if len(org_ids) > 1:
+        raise ValueError(f"Exports belong to different organizations: {sorted(org_ids)}")
+
+    shards = [export.get("shard") for export in exports]
+    counts = {shard["count"] for shard in shards if shard}
+    if len(counts) > 1:
+        raise ValueError(f"Exports come from different shard counts: {sorted(counts)}")
+
+    # Each shard picks its fetch strategy from its own estimate; full and
+    # lite records must not be mixed in one export
+    field_sets = {
+        "lite" if export.get("export_status", {}).get("strategy", {}).get("lite_fields") else "full"
+        for export in exports
+    }
+    if len(field_sets) > 1:
+        raise ValueError(
+            "Exports were fetched with different fields (full and lite); "
+            "re-run the shards with the same --fields value"
+        )
+
+    errors: List[str] = []
+    retries = 0
+    for export in exports:
+        status = export.get("export_status", {})
+        errors.extend(status.get("errors", []))
+        retries += status.get("retries", 0)
+
+    if counts:
+        count = counts.pop()
+        present = {shard["index"] for shard in shards if shard}
+        missing = sorted(set(range(1, count + 1)) - present)
+        if missing:
+            errors.append(f"Missing shards: {', '.join(f'{i}/{count}' for i in missing)}")
+
+    # Members are added before memberships, so memberships of users whose
+    # names were left to the merge pick up the full member records;
+    # export_data puts everything in canonical order
+    store = OrgStore()
+    for export in exports:
+        for member in export.get("members", []):
+            store.add_member(member)
+    for export in exports:
+        for team in export.get("teams", []):
+            store.add_team(team)
+
+    seen = set()
+    memberships = (membership for export in exports for membership in export.get("team_memberships", []))
+    for membership in memberships:
+        key = (membership["team_id"], membership["user_id"])
+        if key in seen:
+            continue
+        seen.add(key)
+        store.add_membership(
+            membership["team_id"],
+            membership.get("team_name"),
+            membership["user_id"],
+            user_login=membership.get("user_login"),
+            user_name=membership.get("user_name"),
+            role=membership.get("role", "member")
+        )
+
+    # Team repositories are present only if the shards exported them
+    for export in exports:
+        if "team_repositories" not in export:
+            continue
+        store.has_team_repositories = True
+        for grant in export["team_repositories"]:
+            store.add_team_repository(
+                grant["team_id"],
+                grant.get("team_name"),
+                grant["repo_id"],
+                grant["repo"],
+                grant["permission"]
+            )
+
+    export_status = {
+        "complete": not errors,
+        "errors": errors,
+        "retries": retries,
+        "shards": len(exports)
+    }
+    logger.info(f"Merged {len(exports)} exports: {store.statistics()}")
+    return store.export_data(exports[0]["organization"], export_status)
@@ -0,0 +1,113 @@
+"""
+Cache of team repository grants between export runs.
+
+Listing every team's repositories costs at least one request per team.
+The grants fetched for each team are saved together with the team's
+``repos_count`` and ``updated_at``; on the next run, teams whose values
+are unchanged reuse the saved grants instead of listing their
+repositories again.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (repo_id, repo full name, permission)
+RepoGrant = Tuple[int, str, str]
+
+
+class TeamRepoCache:
+    """Team repository grants from the previous run, keyed by team ID."""
+
+    def __init__(self, path: Path):
+        """
+        Load the cache (or start an empty one).
+
+        Args:
+            path: Cache file path
+        """
+        self.path = path
+        self.teams: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._seen = set()
+        if path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.teams = json.load(f).get("teams", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable team repository cache {path}: {e}")
+
+    @classmethod
+    def for_export(cls, output_dir: str, name: str) -> "TeamRepoCache":
+        """
+        Open the cache for an export.
+
+        Args:
+            output_dir: Export directory
+            name: Export name (organization name, or shard name)
+
+        Returns:
+            TeamRepoCache
+        """
+        return cls(Path(output_dir) / f"{name}_team_repos_cache.json")
+
+    def get(self, team_id: int, repos_count: Optional[int], updated_at: Optional[str]) -> Optional[List[RepoGrant]]:
+        """
+        Get a team's saved grants if the team is unchanged.
+
+        Teams without ``repos_count`` or ``updated_at`` (lite fields) are
+        never served from the cache.
+
+        Args:
+            team_id: Team ID
+            repos_count: Team's current repository count
+            updated_at: Team's current update time
+
+        Returns:
+            List of (repo_id, repo, permission) or None
+        """
+        self._seen.add(str(team_id))
+        entry = self.teams.get(str(team_id))
+        if (
+            entry is None
+            or repos_count is None
+            or updated_at is None
+            or entry["repos_count"] != repos_count
+            or entry["updated_at"] != updated_at
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [tuple(grant) for grant in entry["repositories"]]
+
+    def put(self, team_id: int, repos_count: Optional[int], updated_at: Optional[str], grants: List[RepoGrant]):
+        """
+        Save a team's freshly fetched grants.
+
+        Args:
+            team_id: Team ID
+            repos_count: Team's repository count
+            updated_at: Team's update time
+            grants: List of (repo_id, repo, permission)
+        """
+        if repos_count is None or updated_at is None:
+            return
+        self.teams[str(team_id)] = {
+            "repos_count": repos_count,
+            "updated_at": updated_at,
+            "repositories": [list(grant) for grant in grants]
+        }
+
+    def save(self):
+        """Write the cache atomically, dropping teams not seen in this run."""
+        self.teams = {team_id: entry for team_id, entry in self.teams.items() if team_id in self._seen}
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"teams": self.teams}, f, separators=(",", ":"), sort_keys=True)
+        os.replace(tmp, self.path)
+        logger.info(f"Saved team repository cache: {self.path} ({self.hits} teams reused, {self.misses} fetched)")
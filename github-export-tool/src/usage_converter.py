@@ -0,0 +1,475 @@
+"""
+Parallel conversion of Copilot usage dumps to one normalized schema.
+
+Usage reports come as CSV, NDJSON or JSON array files with slightly
+different shapes: flat rows with ``primary_ide`` columns, or nested
+records with ``totals_by_*`` breakdowns, numeric or string user IDs
+(stored as text) and boolean or 0/1 flags. Every record is normalized to USAGE_FIELDS.
+
+Conversion runs in three steps:
+
+1. Files are split into work units (byte ranges of CSV and NDJSON files,
+   whole JSON array files) that worker processes read line by line,
+   normalize and spool to per-day files.
+2. Each day is deduplicated on (day, user_id) in parallel, keeping the
+   record that appears last in input order, and written as one NDJSON
+   partition.
+3. For SQLite output, the partitions are bulk-loaded into an indexed table.
+"""
+
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from diffing import _JSONStream
+
+logger = logging.getLogger(__name__)
+
+USAGE_FIELDS = (
+    "report_start_day", "report_end_day", "day", "enterprise_id",
+    "user_id", "user_login",
+    "user_initiated_interaction_count", "code_generation_activity_count",
+    "code_acceptance_activity_count", "used_agent", "used_chat",
+    "loc_suggested_to_add_sum", "loc_suggested_to_delete_sum",
+    "loc_added_sum", "loc_deleted_sum",
+    "primary_ide", "primary_ide_version", "primary_plugin_version",
+    "breakdowns"
+)
+
+COUNT_FIELDS = (
+    "user_initiated_interaction_count", "code_generation_activity_count",
+    "code_acceptance_activity_count", "loc_suggested_to_add_sum",
+    "loc_suggested_to_delete_sum", "loc_added_sum", "loc_deleted_sum"
+)
+
+FLAG_FIELDS = ("used_agent", "used_chat")
+
+TEXT_FIELDS = (
+    "report_start_day", "report_end_day", "day", "enterprise_id", "user_login",
+    "primary_ide", "primary_ide_version", "primary_plugin_version"
+)
+
+# Nested per-IDE/feature/language/model totals, kept together as JSON
+BREAKDOWN_FIELDS = (
+    "totals_by_ide", "totals_by_feature", "totals_by_language_feature",
+    "totals_by_language_model", "totals_by_model_feature"
+)
+
+INPUT_EXTENSIONS = (".csv", ".ndjson", ".jsonl", ".json")
+
+# Work unit size for splitting large CSV/NDJSON files
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Input order of a record: file index in the high bits, position in the low bits
+_POSITION_BITS = 40
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    return str(value)
+
+
+def _count(value: Any) -> int:
+    if value is None or value == "":
+        return 0
+    if isinstance(value, str):
+        return int(float(value))
+    return int(value)
+
+
+def _flag(value: Any) -> int:
+    if isinstance(value, str):
+        return 1 if value.strip().lower() in ("1", "true", "yes") else 0
+    return 1 if value else 0
+
+
+def _user_id(value: Any) -> Optional[str]:
+    # Always text, so 12345 and "12345" are the same user when deduplicating
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    if value.isdecimal():
+        return str(int(value))
+    return value or None
+
+
+def normalize_record(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Normalize one usage record to USAGE_FIELDS.
+
+    Missing counts become 0 and flags 0/1, user IDs become text (numeric
+    IDs without leading zeros), and the primary IDE fields are taken from the first
+    ``totals_by_ide`` entry when the record has no flat columns.
+
+    Args:
+        record: Raw record from a CSV row or JSON object
+
+    Returns:
+        Normalized record, or None if it has no day or user ID or a
+        count is not a number
+    """
+    day = _text(record.get("day"))
+    user_id = _user_id(record.get("user_id"))
+    if day is None or user_id is None:
+        return None
+
+    normalized = {field: _text(record.get(field)) for field in TEXT_FIELDS}
+    normalized["user_id"] = user_id
+    try:
+        for field in COUNT_FIELDS:
+            normalized[field] = _count(record.get(field))
+    except (ValueError, TypeError, OverflowError):
+        # Non-numeric counts such as "N/A": the record is unreadable
+        return None
+    for field in FLAG_FIELDS:
+        normalized[field] = _flag(record.get(field))
+
+    ides = record.get("totals_by_ide") or []
+    if ides and isinstance(ides[0], dict):
+        first = ides[0]
+        if normalized["primary_ide"] is None:
+            normalized["primary_ide"] = _text(first.get("ide"))
+        if normalized["primary_ide_version"] is None:
+            normalized["primary_ide_version"] = _text((first.get("last_known_ide_version") or {}).get("ide_version"))
+        if normalized["primary_plugin_version"] is None:
+            normalized["primary_plugin_version"] = _text((first.get("last_known_plugin_version") or {}).get("plugin_version"))
+
+    breakdowns = {field: record[field] for field in BREAKDOWN_FIELDS if record.get(field)}
+    normalized["breakdowns"] = breakdowns or None
+    return {field: normalized[field] for field in USAGE_FIELDS}
+
+
+def detect_format(path: Path) -> str:
+    """
+    Detect the format of a usage file.
+
+    ``.json`` files are JSON arrays if they start with ``[``, otherwise
+    NDJSON (one object per line).
+
+    Args:
+        path: Input file
+
+    Returns:
+        'csv', 'ndjson' or 'json'
+    """
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".ndjson", ".jsonl"):
+        return "ndjson"
+    with open(path, "rb") as f:
+        head = f.read(4096).lstrip(b"\xef\xbb\xbf \t\r\n")
+    return "json" if head.startswith(b"[") else "ndjson"
+
+
+def find_inputs(paths: List[str]) -> List[Path]:
+    """
+    Expand input paths, replacing directories by the usage files they contain.
+
+    Args:
+        paths: Files or directories
+
+    Returns:
+        Input files in a stable order
+    """
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(
+                child for child in path.rglob("*")
+                if child.is_file() and child.suffix.lower() in INPUT_EXTENSIONS
+            ))
+        else:
+            files.append(path)
+    return files
+
+
+def _csv_header(path: Path) -> List[str]:
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def plan_units(files: List[Path], chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Tuple[int, str, str, int, int]]:
+    """
+    Split input files into work units.
+
+    CSV and NDJSON files larger than ``chunk_size`` are split into byte
+    ranges; a range owns every line that starts inside it. JSON array
+    files are one unit each. CSV files without ``day`` and ``user_id``
+    columns are skipped. Byte ranges assume CSV fields contain no line
+    breaks, which holds for Copilot usage reports.
+
+    Args:
+        files: Input files
+        chunk_size: Target bytes per unit
+
+    Returns:
+        List of (file index, path, format, start, end)
+    """
+    units = []
+    for index, path in enumerate(files):
+        fmt = detect_format(path)
+        if fmt == "csv":
+            header = _csv_header(path)
+            if "day" not in header or "user_id" not in header:
+                logger.warning(f"Skipping {path}: not a Copilot usage file (no day/user_id columns)")
+                continue
+        size = path.stat().st_size
+        if fmt == "json" or size <= chunk_size:
+            units.append((index, str(path), fmt, 0, size))
+            continue
+        for start in range(0, size, chunk_size):
+            units.append((index, str(path), fmt, start, min(size, start + chunk_size)))
+    return units
+
+
+def _iter_lines(path: str, start: int, end: int) -> Iterator[Tuple[int, bytes]]:
+    """Yield (offset, line) for every line that starts in [start, end)."""
+    with open(path, "rb") as f:
+        if start > 0:
+            # Skip the line that started in the previous range
+            f.seek(start - 1)
+            f.readline()
+        offset = f.tell()
+        while offset < end:
+            line = f.readline()
+            if not line:
+                return
+            yield offset, line
+            offset += len(line)
+
+
+def _iter_unit(unit: Tuple[int, str, str, int, int]) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    """Yield (position, raw record or None if unreadable) for a work unit."""
+    _, path, fmt, start, end = unit
+    if fmt == "json":
+        with open(path, "r", encoding="utf-8-sig") as f:
+            for position, item in enumerate(_JSONStream(f).items()):
+                yield position, item if isinstance(item, dict) else None
+        return
+
+    if fmt == "ndjson":
+        for offset, line in _iter_lines(path, start, end):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                item = None
+            yield offset, item if isinstance(item, dict) else None
+        return
+
+    header = _csv_header(Path(path))
+    current = [0]
+
+    def lines() -> Iterator[str]:
+        for offset, line in _iter_lines(path, start, end):
+            if offset == 0 or not line.strip():
+                continue
+            current[0] = offset
+            yield line.decode("utf-8")
+
+    for row in csv.reader(lines()):
+        yield current[0], dict(zip(header, row))
+
+
+def _spool_unit(job: Tuple[int, Tuple[int, str, str, int, int], str]) -> Tuple[int, int]:
+    """
+    Normalize one work unit and spool its records to per-day files.
+
+    Each spooled line is ``{input order}\\t{record JSON}``.
+
+    Returns:
+        Tuple of (records spooled, records skipped)
+    """
+    unit_id, unit, spool_dir = job
+    file_index = unit[0]
+    files: Dict[str, Any] = {}
+    spooled = skipped = 0
+    try:
+        for position, raw in _iter_unit(unit):
+            record = normalize_record(raw) if raw is not None else None
+            # The day names a spool directory, so it must be a plain date
+            if record is None or not record["day"].replace("-", "").isalnum():
+                skipped += 1
+                continue
+            day = record["day"]
+            f = files.get(day)
+            if f is None:
+                day_dir = Path(spool_dir) / day
+                day_dir.mkdir(exist_ok=True)
+                f = files[day] = open(day_dir / f"{unit_id}.ndjson", "w", encoding="utf-8")
+            order = (file_index << _POSITION_BITS) + position
+            f.write(f"{order}\t{json.dumps(record, ensure_ascii=False)}\n")
+            spooled += 1
+    finally:
+        for f in files.values():
+            f.close()
+    return spooled, skipped
+
+
+def _user_sort_key(user_id: str) -> Tuple[int, Any]:
+    return (0, int(user_id)) if user_id.isdecimal() else (1, user_id)
+
+
+def _dedupe_day(job: Tuple[str, str, str]) -> Tuple[str, int, int]:
+    """
+    Deduplicate one day on user_id and write it as an NDJSON partition.
+
+    Returns:
+        Tuple of (day, records written, duplicates dropped)
+    """
+    day, spool_dir, output_path = job
+    latest: Dict[str, Tuple[int, str]] = {}
+    seen = 0
+    for spool_file in sorted((Path(spool_dir) / day).iterdir()):
+        with open(spool_file, "r", encoding="utf-8") as f:
+            for line in f:
+                order, _, text = line.partition("\t")
+                order = int(order)
+                user_id = json.loads(text)["user_id"]
+                seen += 1
+                previous = latest.get(user_id)
+                if previous is None or order > previous[0]:
+                    latest[user_id] = (order, text)
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        for user_id in sorted(latest, key=_user_sort_key):
+            f.write(latest[user_id][1])
+    return day, len(latest), seen - len(latest)
+
+
+def _load_sqlite(filepath: Path, partitions: List[Path]) -> None:
+    """Bulk-load NDJSON partitions into an indexed SQLite table."""
+    db = sqlite3.connect(str(filepath))
+    try:
+        db.execute("PRAGMA journal_mode = OFF")
+        db.execute("PRAGMA synchronous = OFF")
+        columns = ", ".join(
+            f"{field} INTEGER" if field in COUNT_FIELDS + FLAG_FIELDS
+            else f"{field} TEXT" if field == "user_id"
+            else f"{field}"
+            for field in USAGE_FIELDS
+        )
+        db.execute(f"CREATE TABLE usage ({columns})")
+        placeholders = ", ".join("?" for _ in USAGE_FIELDS)
+        for partition in partitions:
+            with open(partition, "r", encoding="utf-8") as f:
+                rows = (json.loads(line) for line in f)
+                db.executemany(
+                    f"INSERT INTO usage VALUES ({placeholders})",
+                    (
+                        tuple(
+                            json.dumps(row[field], ensure_ascii=False) if field == "breakdowns" and row[field] is not None
+                            else row[field]
+                            for field in USAGE_FIELDS
+                        )
+                        for row in rows
+                    )
+                )
+        # Indexes are built once after loading, which is much faster than
+        # maintaining them row by row
+        db.execute("CREATE UNIQUE INDEX idx_usage_day_user ON usage (day, user_id)")
+        db.execute("CREATE INDEX idx_usage_user ON usage (user_id)")
+        db.commit()
+    finally:
+        db.close()
+
+
+def convert_usage(
+    inputs: List[str],
+    output_dir: str = "./exports",
+    output_format: str = "sqlite",
+    name: str = "copilot_usage",
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Convert Copilot usage files to deduplicated SQLite or partitioned NDJSON.
+
+    Args:
+        inputs: Input files or directories
+        output_dir: Output directory
+        output_format: 'sqlite' (``{name}.sqlite``) or 'ndjson'
+            (``{name}/{day}.ndjson``, one file per day)
+        name: Output name
+        workers: Worker processes (default: CPU count)
+        chunk_size: Target bytes per work unit for CSV/NDJSON files
+
+    Returns:
+        Dictionary with the output path, files read, records read,
+        written, skipped and duplicates dropped
+
+    Raises:
+        ValueError: If no usable input files are found
+    """
+    files = find_inputs(inputs)
+    units = plan_units(files, chunk_size)
+    if not units:
+        raise ValueError("No Copilot usage files found in the inputs")
+
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    workers = max(1, workers or os.cpu_count() or 1)
+    logger.info(f"Converting {len(files)} files ({len(units)} work units) with {workers} workers")
+
+    work_dir = Path(tempfile.mkdtemp(prefix=f".{name}_", dir=output))
+    spool_dir = work_dir / "spool"
+    partition_dir = work_dir / "partitions"
+    spool_dir.mkdir()
+    partition_dir.mkdir()
+    try:
+        with multiprocessing.Pool(workers) as pool:
+            jobs = [(unit_id, unit, str(spool_dir)) for unit_id, unit in enumerate(units)]
+            read = skipped = 0
+            for spooled, bad in pool.imap_unordered(_spool_unit, jobs):
+                read += spooled
+                skipped += bad
+
+            days = sorted(path.name for path in spool_dir.iterdir())
+            jobs = [(day, str(spool_dir), str(partition_dir / f"{day}.ndjson")) for day in days]
+            written = duplicates = 0
+            for _, count, dropped in pool.imap_unordered(_dedupe_day, jobs):
+                written += count
+                duplicates += dropped
+
+        shutil.rmtree(spool_dir)
+        partitions = [partition_dir / f"{day}.ndjson" for day in days]
+
+        if output_format == "sqlite":
+            filepath = output / f"{name}.sqlite"
+            tmp = work_dir / filepath.name
+            _load_sqlite(tmp, partitions)
+            os.replace(tmp, filepath)
+        else:
+            filepath = output / name
+            if filepath.exists():
+                shutil.rmtree(filepath)
+            os.replace(partition_dir, filepath)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if skipped:
+        logger.warning(f"Skipped {skipped} unreadable records or records without day/user_id")
+    logger.info(
+        f"Converted {read} records to {written} ({duplicates} duplicates dropped): {filepath}"
+    )
+    return {
+        "path": str(filepath),
+        "files": len({unit[1] for unit in units}),
+        "records": read,
+        "written": written,
+        "skipped": skipped,
+        "duplicates": duplicates,
+        "days": len(days)
+    }
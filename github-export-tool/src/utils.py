@@ -154,6 +154,20 @@ def print_summary(data: dict):
         print(f"\nTotal Members:      {stats.get('total_members', 0):>6}")
         print(f"Total Teams:        {stats.get('total_teams', 0):>6}")
         print(f"Total Memberships:  {stats.get('total_memberships', 0):>6}")
+        if "total_team_repositories" in stats:
+            print(f"Team Repositories:  {stats['total_team_repositories']:>6}")
+    
+    if "analytics" in data:
+        analytics = data["analytics"]
+        multi_team = sum(row["users"] for row in analytics["team_count_distribution"] if row["teams_per_user"] > 1)
+        print(f"\nOverlapping Pairs:  {len(analytics['team_overlap']):>6}")
+        print(f"Multi-team Users:   {multi_team:>6}")
+    
+    if "export_status" in data:
+        status = data["export_status"]
+        print(f"\nStatus:             {'complete' if status.get('complete') else 'INCOMPLETE'}")
+        if status.get("retries"):
+            print(f"Retried Requests:   {status['retries']:>6}")
     
     print("=" * 60)
 